@@ -1,25 +1,58 @@
 from django.contrib import admin
-from .models import Post, Comment, Like, Newsletter
+from .models import Post, Comment, Like, Newsletter, Tag
+from .pagination import EstimatedCountPaginator
+from .moderation import moderate_comments
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    # Bez drugiego COUNT(*) po całej tabeli przy wyszukiwaniu/filtrowaniu.
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'post_count')
+    search_fields = ('name',)
+    prepopulated_fields = {'slug': ('name',)}
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(ScalableModelAdmin):
     list_display = ('title', 'author', 'created_date', 'published_date')
     list_filter = ('created_date', 'published_date')
+    list_select_related = ('author',)
     search_fields = ('title', 'content')
+    raw_id_fields = ('author',)
+    filter_horizontal = ('tags',)
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ('post', 'author', 'created_date')
-    list_filter = ('approved_comment', 'created_date')
-    search_fields = ('post', 'author')
+class CommentAdmin(ScalableModelAdmin):
+    list_display = ('post', 'author', 'created_date', 'approved_comment', 'rejected_comment')
+    list_filter = ('approved_comment', 'rejected_comment', 'created_date')
+    list_select_related = ('post', 'author')
+    search_fields = ('text', 'post__title', 'author__username')
+    raw_id_fields = ('post', 'author')
+    actions = ('approve_comments', 'reject_comments')
+
+    @admin.action(description='Zatwierdź zaznaczone komentarze')
+    def approve_comments(self, request, queryset):
+        updated = moderate_comments(queryset.values('pk'), approve=True)
+        self.message_user(request, f'Zatwierdzono komentarzy: {updated}.')
+
+    @admin.action(description='Odrzuć zaznaczone komentarze')
+    def reject_comments(self, request, queryset):
+        updated = moderate_comments(queryset.values('pk'), approve=False)
+        self.message_user(request, f'Odrzucono komentarzy: {updated}.')
 
 
 @admin.register(Like)
-class LikeAdmin(admin.ModelAdmin):
+class LikeAdmin(ScalableModelAdmin):
     list_display = ('post', 'user', 'created_date')
+    list_select_related = ('post', 'user')
+    search_fields = ('post__title', 'user__username')
+    raw_id_fields = ('post', 'user')
 
 @admin.register(Newsletter)
-class NewsletterAdmin(admin.ModelAdmin):
+class NewsletterAdmin(ScalableModelAdmin):
     list_display = ('email', 'subscribed_date', 'is_active')
     list_filter = ('is_active', 'subscribed_date')
     search_fields = ('email',)
@@ -0,0 +1,155 @@
+import hashlib
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views.decorators.http import condition, require_GET
+
+from .cache import get_version
+from .models import Like, Post
+from .pagination import keyset_page
+
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Pole w API -> kolumna w values(); None oznacza adnotację z licznikiem.
+POST_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'content': 'content',
+    'author': 'author__username',
+    'created_date': 'created_date',
+    'published_date': 'published_date',
+    'likes_count': None,
+    'comments_count': 'comment_count',
+}
+
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created_date': 'created_date',
+}
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def _count(model):
+    counts = (
+        model.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(count=Count('*'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+POST_ANNOTATIONS = {
+    'likes_count': lambda: _count(Like),
+}
+
+
+def _requested_fields(request, available):
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(available)
+    fields = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise FieldsError(f'Nieznane pola: {", ".join(unknown)}')
+    return fields
+
+
+def _select(queryset, fields, available, required, annotations=None):
+    """
+    Pobiera z bazy tylko kolumny potrzebne dla ?fields= (plus klucz kursora)
+    i liczniki, o które ktoś faktycznie poprosił.
+    """
+    annotations = annotations or {}
+    queryset = queryset.annotate(**{
+        field: annotations[field]() for field in fields if available[field] is None
+    })
+    columns = {available[field] or field for field in fields} | set(required)
+    return queryset.values(*columns)
+
+
+def _serialize(row, fields, available):
+    return {field: row[available[field] or field] for field in fields}
+
+
+def _limit(request):
+    try:
+        return max(1, min(int(request.GET.get('limit', DEFAULT_LIMIT)), MAX_LIMIT))
+    except ValueError:
+        return DEFAULT_LIMIT
+
+
+def _etag(request, *names):
+    versions = ':'.join(str(get_version(name)) for name in names)
+    return hashlib.md5(f'{versions}:{request.get_full_path()}'.encode('utf-8')).hexdigest()
+
+
+def _next_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def _published_posts():
+    return Post.objects.filter(published_date__lte=timezone.now())
+
+
+@require_GET
+@condition(etag_func=lambda request: _etag(request, 'posts'))
+def post_list(request):
+    try:
+        fields = _requested_fields(request, POST_FIELDS)
+    except FieldsError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    rows = _select(_published_posts(), fields, POST_FIELDS, ('id', 'published_date'), POST_ANNOTATIONS)
+    rows, next_cursor = keyset_page(rows, request.GET.get('cursor'), _limit(request))
+
+    return JsonResponse({
+        'results': [_serialize(row, fields, POST_FIELDS) for row in rows],
+        'next': _next_url(request, next_cursor)
+    })
+
+
+@require_GET
+@condition(etag_func=lambda request, pk: _etag(request, f'post:{pk}'))
+def post_detail(request, pk):
+    try:
+        fields = _requested_fields(request, POST_FIELDS)
+    except FieldsError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    rows = _select(_published_posts().filter(pk=pk), fields, POST_FIELDS, ('id',), POST_ANNOTATIONS)
+    return JsonResponse(_serialize(get_object_or_404(rows), fields, POST_FIELDS))
+
+
+@require_GET
+@condition(etag_func=lambda request, pk: _etag(request, f'comments:{pk}'))
+def comment_list(request, pk):
+    try:
+        fields = _requested_fields(request, COMMENT_FIELDS)
+    except FieldsError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    post = get_object_or_404(_published_posts().only('id'), pk=pk)
+    rows = _select(post.comments.filter(approved_comment=True), fields, COMMENT_FIELDS, ('id', 'created_date'))
+    rows, next_cursor = keyset_page(rows, request.GET.get('cursor'), _limit(request), field='created_date')
+
+    return JsonResponse({
+        'results': [_serialize(row, fields, COMMENT_FIELDS) for row in rows],
+        'next': _next_url(request, next_cursor)
+    })
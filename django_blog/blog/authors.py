@@ -0,0 +1,61 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .cache import get_object
+from .models import AuthorStats, Like, Post
+
+
+def _count(queryset, group_by, aggregate=Count('*')):
+    rows = queryset.order_by().values(group_by).annotate(total=aggregate).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def refresh_author_stats(author_ids, now=None):
+    """
+    Przelicza od zera liczniki wskazanych autorów jednym UPDATE z podzapytaniami.
+    Liczą się tylko opublikowane posty; polubienia i komentarze - wszystkich.
+    """
+    author_ids = set(author_ids)
+    if not author_ids:
+        return
+    AuthorStats.objects.bulk_create([AuthorStats(author_id=pk) for pk in author_ids], ignore_conflicts=True)
+    posts = Post.objects.filter(author=OuterRef('author_id'))
+    AuthorStats.objects.filter(author_id__in=author_ids).update(
+        post_count=_count(posts.filter(published_date__lte=now or timezone.now()), 'author'),
+        like_count=_count(Like.objects.filter(post__author=OuterRef('author_id')), 'post__author'),
+        comment_count=_count(posts, 'author', Sum('comment_count')),
+    )
+
+
+def refresh_author_comment_counts(author_ids):
+    """Po zbiorczej moderacji: suma Post.comment_count postów autora."""
+    posts = Post.objects.filter(author=OuterRef('author_id'))
+    AuthorStats.objects.filter(author_id__in=author_ids).update(
+        comment_count=_count(posts, 'author', Sum('comment_count'))
+    )
+
+
+def change_author_stats(author_id, **deltas):
+    """
+    Zmienia liczniki o podane wartości. Zmniejszenie nie schodzi poniżej zera
+    i nie tworzy brakującego wiersza (autor mógł zostać właśnie usunięty);
+    zwiększenie u autora bez wiersza przelicza go od zera.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updated = AuthorStats.objects.filter(author_id=author_id).update(**{
+        field: F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+    if not updated and any(delta > 0 for delta in deltas.values()):
+        refresh_author_stats([author_id])
+
+
+def post_author_id(instance):
+    """Autor posta, pod którym jest polubienie/komentarz - bez zapytania, jeśli to możliwe."""
+    if type(instance).post.is_cached(instance):
+        return instance.post.author_id
+    post = get_object(Post, instance.post_id)
+    return post.author_id if post is not None else None
@@ -0,0 +1,109 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .routers import PRIMARY_DB
+
+# Obiekty nieużywane przez tyle sekund wypadają z cache; aktualność
+# zapewniają numery wersji, nie czas życia wpisu.
+OBJECT_TIMEOUT = 60 * 60
+
+
+def _version_key(name):
+    return f'blog:version:{name}'
+
+
+def get_version(name):
+    """
+    Numer wersji danych (np. 'posts', 'post:12'), zwiększany przy każdej
+    zmianie. Po utracie wpisu w cache startuje od bieżącego czasu, więc nowa
+    wersja nigdy nie pokryje się z którąś z wcześniej wydanych.
+    """
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(names):
+    """Jak get_version, ale dla wielu nazw naraz: {nazwa: wersja}."""
+    keys = {_version_key(name): name for name in names}
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        versions.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def bump_version(*names):
+    for name in names:
+        key = _version_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def touch_object(name):
+    """
+    Podbija wersję od razu i jeszcze raz po zatwierdzeniu transakcji - odczyt
+    z bazy pomiędzy zapisem a commitem mógł trafić do cache ze starymi danymi.
+    """
+    bump_version(name)
+    transaction.on_commit(lambda: bump_version(name))
+
+
+def touch_post(post_id):
+    """Unieważnia dane listy postów oraz konkretnego posta."""
+    bump_version('posts')
+    touch_object(f'post:{post_id}')
+
+
+def _object_name(model, pk):
+    return f'{model._meta.model_name}:{pk}'
+
+
+def get_objects(model, pks):
+    """
+    Odczyt przez cache: {pk: obiekt} dla istniejących wierszy. Klucz zawiera
+    wersję obiektu, więc po zapisie (touch_object) stary wpis nie jest już
+    czytany. Brakujące obiekty są doczytywane jednym zapytaniem.
+    """
+    pks = set(pks)
+    if not pks:
+        return {}
+    versions = get_versions(_object_name(model, pk) for pk in pks)
+    keys = {
+        pk: f'blog:object:{_object_name(model, pk)}:{versions[_object_name(model, pk)]}'
+        for pk in pks
+    }
+    cached = cache.get_many(keys.values())
+    objects = {pk: cached[key] for pk, key in keys.items() if key in cached}
+
+    missing = pks - objects.keys()
+    if missing:
+        # Z bazy głównej - replika mogłaby jeszcze nie mieć zapisu, który podbił wersję.
+        loaded = model._default_manager.using(PRIMARY_DB).in_bulk(missing)
+        cache.set_many({keys[pk]: obj for pk, obj in loaded.items()}, OBJECT_TIMEOUT)
+        objects.update(loaded)
+    return objects
+
+
+def get_object(model, pk):
+    return get_objects(model, [pk]).get(pk)
+
+
+def attach_authors(objects):
+    """Ustawia `author` obiektom z listy na podstawie jednego get_objects()."""
+    from django.contrib.auth.models import User
+
+    objects = list(objects)
+    authors = get_objects(User, {obj.author_id for obj in objects})
+    for obj in objects:
+        obj.author = authors[obj.author_id]
+    return objects
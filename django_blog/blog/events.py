@@ -0,0 +1,203 @@
+import asyncio
+import json
+import logging
+import re
+import select
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+EVENTS_PATH = re.compile(r'^/post/(?P<pk>\d+)/events/$')
+KEEPALIVE_SECONDS = 30
+NOTIFY_CHANNEL = 'blog_live_events'
+
+
+class EventHub:
+    """
+    Rozsyłanie zdarzeń w obrębie jednego procesu. Każdy podłączony klient
+    to jedna kolejka na pętli asyncio, więc bezczynny widz nic nie kosztuje.
+    Kolejki mają rozmiar 1 - liczy się tylko najnowszy stan liczników.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._loop = None
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, post_id):
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=1)
+        self._subscribers[post_id].add(queue)
+        return queue
+
+    def unsubscribe(self, post_id, queue):
+        queues = self._subscribers.get(post_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[post_id]
+
+    def has_subscribers(self, post_id):
+        return bool(self._subscribers.get(post_id))
+
+    def publish(self, post_id, data):
+        """Można wywołać z dowolnego wątku."""
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self.has_subscribers(post_id):
+            return
+        loop.call_soon_threadsafe(self._deliver, post_id, data)
+
+    def _deliver(self, post_id, data):
+        for queue in list(self._subscribers.get(post_id, ())):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(data)
+
+    def start_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='live-events-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        # Zdarzenia z innych workerów przychodzą przez Postgres LISTEN/NOTIFY.
+        while True:
+            try:
+                connection.ensure_connection()
+                raw = connection.connection
+                raw.autocommit = True
+                with raw.cursor() as cursor:
+                    cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
+                while True:
+                    if select.select([raw], [], [], 60) == ([], [], []):
+                        continue
+                    raw.poll()
+                    changed = set()
+                    while raw.notifies:
+                        changed.add(int(raw.notifies.pop(0).payload))
+                    # Liczniki liczy tylko worker, który ma widzów danego posta.
+                    for post_id in changed:
+                        if self.has_subscribers(post_id):
+                            self.publish(post_id, post_counts(post_id))
+            except Exception:
+                logger.exception('Live events listener failed, reconnecting')
+                connection.close()
+                time.sleep(5)
+
+
+hub = EventHub()
+
+
+def use_postgres_notify():
+    return settings.LIVE_EVENTS_BACKEND == 'postgres'
+
+
+def post_counts(post_id):
+    from .models import Like, Post
+
+    return {
+        'post': post_id,
+        'likes_count': Like.objects.filter(post_id=post_id).count(),
+        'comments_count': Post.objects.filter(pk=post_id).values_list('comment_count', flat=True).first() or 0,
+    }
+
+
+def publish_counts(post_id):
+    if use_postgres_notify():
+        # Tylko id posta - liczniki liczą workery, które mają subskrybentów.
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [NOTIFY_CHANNEL, str(post_id)])
+    elif hub.has_subscribers(post_id):
+        hub.publish(post_id, post_counts(post_id))
+
+
+def post_is_published(post_id):
+    from .models import Post
+
+    try:
+        return Post.objects.filter(pk=post_id, published_date__lte=timezone.now()).exists()
+    finally:
+        # Poza cyklem żądania Django nie zamyka połączeń samo.
+        if not connection.in_atomic_block:
+            close_old_connections()
+
+
+async def _not_found(send):
+    await send({
+        'type': 'http.response.start',
+        'status': 404,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+    })
+    await send({'type': 'http.response.body', 'body': b'Not Found'})
+
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def stream_post_events(post_id, receive, send):
+    if use_postgres_notify():
+        hub.start_listener()
+
+    queue = hub.subscribe(post_id)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {getter, disconnected}, timeout=KEEPALIVE_SECONDS, return_when=asyncio.FIRST_COMPLETED
+            )
+            if getter in done:
+                body = f'event: counts\ndata: {json.dumps(getter.result())}\n\n'
+            else:
+                getter.cancel()
+                if disconnected in done:
+                    break
+                body = ': keepalive\n\n'
+            await send({'type': 'http.response.body', 'body': body.encode('utf-8'), 'more_body': True})
+    finally:
+        hub.unsubscribe(post_id, queue)
+        disconnected.cancel()
+
+
+class LiveEventsRouter:
+    """
+    Aplikacja ASGI obsługująca /post/<pk>/events/ (Server-Sent Events)
+    bezpośrednio, z pominięciem Django; pozostałe żądania idą dalej.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            match = EVENTS_PATH.match(scope['path'])
+            if match:
+                post_id = int(match['pk'])
+                # Szkice i zaplanowane posty nie mają publicznego strumienia.
+                if not await sync_to_async(post_is_published)(post_id):
+                    return await _not_found(send)
+                return await stream_post_events(post_id, receive, send)
+        return await self.application(scope, receive, send)
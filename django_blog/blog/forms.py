@@ -1,20 +1,57 @@
 from django import forms
-from .models import Post, Comment, Newsletter
+from django.utils.text import slugify
+from .models import Post, Comment, Newsletter, Tag
 
 class PostForm(forms.ModelForm):
+    tags = forms.CharField(
+        required=False,
+        label='Tagi',
+        help_text='Oddziel tagi przecinkami',
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Django, Python'})
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['tags'].initial = ', '.join(tag.name for tag in self.instance.tags.all())
+
+    def clean_tags(self):
+        names = {}
+        for name in self.cleaned_data['tags'].split(','):
+            name = name.strip()
+            if name and slugify(name):
+                names.setdefault(slugify(name), name[:50])
+        return names
+
+    def save_tags(self, post):
+        tags = []
+        for slug, name in self.cleaned_data['tags'].items():
+            tag, _ = Tag.objects.get_or_create(slug=slug[:50], defaults={'name': name})
+            tags.append(tag)
+        post.tags.set(tags)
+
     class Meta:
         model = Post
 
-        fields = ('title', 'content',)
+        fields = ('title', 'content', 'published_date',)
 
         widgets = {
             'title': forms.TextInput(attrs={'class': 'form-control'}),
-            'content': forms.Textarea(attrs={'class': 'form-control', 'rows': 10})
+            'content': forms.Textarea(attrs={'class': 'form-control', 'rows': 10}),
+            'published_date': forms.DateTimeInput(
+                attrs={'class': 'form-control', 'type': 'datetime-local'},
+                format='%Y-%m-%dT%H:%M'
+            )
         }
 
         labels = {
             'title': 'Tytuł',
-            'content': 'Treść'
+            'content': 'Treść',
+            'published_date': 'Data publikacji'
+        }
+
+        help_texts = {
+            'published_date': 'Zostaw puste, aby opublikować od razu. Data w przyszłości zaplanuje publikację.'
         }
 
 class CommentForm(forms.ModelForm):
@@ -30,6 +67,9 @@ class CommentForm(forms.ModelForm):
         }
 
 class NewsletterForm(forms.ModelForm):
+    def clean_email(self):
+        return self.cleaned_data['email'].strip().lower()
+
     class Meta:
         model = Newsletter
         fields = ('email',)
@@ -0,0 +1,81 @@
+import logging
+import math
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+from django.http import JsonResponse
+from django.utils.cache import add_never_cache_headers
+
+logger = logging.getLogger(__name__)
+
+READY_CACHE_KEY = 'blog:readyz'
+
+
+def probe_connection():
+    """
+    Nowe połączenie z ustawieniami bazy głównej. Na PostgreSQL connect_timeout
+    nie pozwala czekać na nieosiągalny serwer dłużej niż HEALTHCHECK_TIMEOUT.
+    """
+    settings_dict = connections.settings[DEFAULT_DB_ALIAS]
+    options = dict(settings_dict['OPTIONS'])
+    if settings_dict['ENGINE'] == 'django.db.backends.postgresql':
+        options['connect_timeout'] = max(1, math.ceil(settings.HEALTHCHECK_TIMEOUT))
+    backend = load_backend(settings_dict['ENGINE'])
+    return backend.DatabaseWrapper({**settings_dict, 'OPTIONS': options}, DEFAULT_DB_ALIAS)
+
+
+def ping_database():
+    # Osobne połączenie, a nie to z puli wątku: sprawdzamy, czy baza przyjmuje
+    # nowe połączenia, i nie zostawiamy po sobie ustawień sesji.
+    connection = probe_connection()
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET statement_timeout = %s', [int(settings.HEALTHCHECK_TIMEOUT * 1000)])
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    finally:
+        connection.close()
+
+
+def ping_cache():
+    token = uuid.uuid4().hex
+    cache.set(READY_CACHE_KEY, token, 10)
+    if cache.get(READY_CACHE_KEY) != token:
+        raise RuntimeError('cache did not return the stored value')
+
+
+CHECKS = {
+    'database': ping_database,
+    'cache': ping_cache,
+}
+
+
+def _response(data, status=200):
+    response = JsonResponse(data, status=status)
+    add_never_cache_headers(response)
+    return response
+
+
+def liveness():
+    """Proces żyje i obsługuje żądania - bez bazy i cache."""
+    return _response({'status': 'ok'})
+
+
+def readiness():
+    """Instancja może przyjmować ruch: baza i cache odpowiadają."""
+    results = {}
+    for name, check in CHECKS.items():
+        try:
+            check()
+        except Exception as exc:
+            logger.warning('Readiness check %s failed: %r', name, exc)
+            results[name] = type(exc).__name__
+        else:
+            results[name] = 'ok'
+
+    ready = all(result == 'ok' for result in results.values())
+    return _response({'status': 'ok' if ready else 'unavailable', 'checks': results}, status=200 if ready else 503)
@@ -0,0 +1,65 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import scheduling, snapshots
+from blog.models import Post, StaleSnapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Odbudowuje statyczne kopie HTML stron (serwowane przez nginx anonimowym '
+        'czytelnikom) - domyślnie tylko te oznaczone jako nieaktualne.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Wygeneruj wszystkie strony od nowa.')
+        parser.add_argument(
+            '--watch', type=float, metavar='SECONDS',
+            help='Działaj w pętli, sprawdzając kolejkę co SECONDS sekund.'
+        )
+
+    def handle(self, *args, **options):
+        if not snapshots.enabled():
+            raise CommandError('Snapshoty są wyłączone (STATIC_SNAPSHOTS_ENABLED).')
+
+        if options['all']:
+            self.build_all()
+
+        while True:
+            # Bez tego strony z zaplanowanymi postami czekałyby na żądanie trafiające do Django.
+            scheduling.publish_due()
+            built = self.build_stale()
+            if built:
+                self.stdout.write(f'Odbudowano {built} stron.')
+            if not options['watch']:
+                break
+            time.sleep(options['watch'])
+
+    def build_stale(self):
+        stale = list(StaleSnapshot.objects.values_list('path', 'queued_date'))
+        for path, queued_date in stale:
+            snapshots.write_snapshot(path)
+            # Jeśli w międzyczasie strona znowu się zmieniła, zostaje w kolejce.
+            StaleSnapshot.objects.filter(path=path, queued_date=queued_date).delete()
+        return len(stale)
+
+    def build_all(self):
+        paths = [reverse('post_list')] + [
+            reverse('post_detail', args=[pk])
+            for pk in Post.objects.filter(published_date__lte=timezone.now()).values_list('pk', flat=True).iterator()
+        ]
+        for path in paths:
+            snapshots.write_snapshot(path)
+
+        # Kopie postów, które zniknęły albo zostały wycofane z publikacji.
+        expected = {snapshots.snapshot_file(path) for path in paths}
+        root = snapshots.snapshot_file(reverse('post_list')).parent
+        for existing in root.glob('post/*/index.html'):
+            if existing.resolve() not in expected:
+                existing.unlink()
+
+        self.stdout.write(self.style.SUCCESS(f'Wygenerowano {len(paths)} stron w {settings.STATIC_SNAPSHOT_ROOT}.'))
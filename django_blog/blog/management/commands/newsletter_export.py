@@ -0,0 +1,30 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from blog.models import Newsletter
+
+
+class Command(BaseCommand):
+    help = 'Eksportuje aktywnych subskrybentów newslettera do CSV (strumieniowo).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help='Plik wynikowy albo "-" dla stdout.')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        output = self.stdout if options['path'] == '-' else open(options['path'], 'w', encoding='utf-8', newline='')
+        try:
+            writer = csv.writer(output)
+            writer.writerow(['email', 'subscribed_date'])
+            subscribers = (
+                Newsletter.objects.filter(is_active=True)
+                .order_by('pk')
+                .values_list('email', 'subscribed_date')
+                .iterator(chunk_size=options['chunk_size'])
+            )
+            for email, subscribed_date in subscribers:
+                writer.writerow([email, subscribed_date.isoformat()])
+        finally:
+            if output is not self.stdout:
+                output.close()
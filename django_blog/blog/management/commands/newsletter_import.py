@@ -0,0 +1,61 @@
+import io
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from blog.models import Newsletter
+from blog.newsletter import chunked, read_emails
+
+
+class Command(BaseCommand):
+    help = (
+        'Importuje subskrybentów newslettera z pliku CSV (albo "-" dla stdin). '
+        'Adresy są normalizowane i deduplikowane; istniejące - także wypisane - są pomijane.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Plik CSV albo "-" dla standardowego wejścia.')
+        parser.add_argument('--column', default='email', help='Nazwa kolumny z adresem.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--copy', action='store_true',
+            help='Na PostgreSQL ładuj dane przez COPY do tabeli tymczasowej.'
+        )
+
+    def handle(self, *args, **options):
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('--copy wymaga bazy PostgreSQL.')
+
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8-sig', newline='')
+        try:
+            emails, stats = read_emails(stream, options['column'].lower())
+            before = Newsletter.objects.count()
+            if options['copy']:
+                self.copy_import(emails, options['batch_size'])
+            else:
+                for batch in chunked(emails, options['batch_size']):
+                    Newsletter.objects.bulk_create(
+                        [Newsletter(email=email) for email in batch],
+                        ignore_conflicts=True
+                    )
+            created = Newsletter.objects.count() - before
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Wiersze: {stats["rows"]}, dodano: {created}, niepoprawne: {stats["invalid"]}, '
+            f'powtórzone w pliku: {stats["duplicates"]}.'
+        ))
+
+    def copy_import(self, emails, batch_size):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('CREATE TEMP TABLE newsletter_import (email varchar(254)) ON COMMIT DROP')
+            for batch in chunked(emails, batch_size):
+                cursor.copy_expert('COPY newsletter_import (email) FROM STDIN', io.StringIO('\n'.join(batch) + '\n'))
+            cursor.execute(
+                f'INSERT INTO {Newsletter._meta.db_table} (email, subscribed_date, is_active) '
+                'SELECT email, now(), true FROM newsletter_import '
+                'ON CONFLICT (email) DO NOTHING'
+            )
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from blog.models import Newsletter
+from blog.newsletter import chunked, read_emails
+
+
+class Command(BaseCommand):
+    help = (
+        'Wypisuje z newslettera adresy z pliku CSV (np. listy odbić) '
+        'partiami: UPDATE ... SET is_active = false WHERE email IN (...).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Plik CSV albo "-" dla standardowego wejścia.')
+        parser.add_argument('--column', default='email', help='Nazwa kolumny z adresem.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--delete', action='store_true', help='Usuń adresy zamiast je dezaktywować.')
+
+    def handle(self, *args, **options):
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8-sig', newline='')
+        changed = 0
+        try:
+            emails, stats = read_emails(stream, options['column'].lower())
+            for batch in chunked(emails, options['batch_size']):
+                subscribers = Newsletter.objects.filter(email__in=batch)
+                if options['delete']:
+                    changed += subscribers.delete()[0]
+                else:
+                    changed += subscribers.filter(is_active=True).update(is_active=False)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        action = 'usunięto' if options['delete'] else 'wypisano'
+        self.stdout.write(self.style.SUCCESS(
+            f'Wiersze: {stats["rows"]}, {action}: {changed}, niepoprawne: {stats["invalid"]}.'
+        ))
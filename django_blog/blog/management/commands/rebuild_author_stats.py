@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.authors import refresh_author_stats
+from blog.models import AuthorStats, Post
+
+
+class Command(BaseCommand):
+    help = 'Przelicza od nowa liczniki autorów (AuthorStats).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        author_ids = sorted(
+            set(Post.objects.order_by().values_list('author_id', flat=True).distinct())
+            | set(AuthorStats.objects.values_list('author_id', flat=True))
+        )
+        batch_size = options['batch_size']
+        for start in range(0, len(author_ids), batch_size):
+            with transaction.atomic():
+                refresh_author_stats(author_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f'Przeliczono liczniki {len(author_ids)} autorów.'))
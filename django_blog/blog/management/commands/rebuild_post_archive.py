@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from blog.models import Post, PostArchiveMonth
+
+
+class Command(BaseCommand):
+    help = 'Przelicza od nowa tabelę archiwum miesięcznego (PostArchiveMonth).'
+
+    def handle(self, *args, **options):
+        months = (
+            Post.objects.filter(published_date__lte=timezone.now())
+            .annotate(month=TruncMonth('published_date'))
+            .values('month')
+            .annotate(post_count=Count('id'))
+            .order_by()
+        )
+        archive = [
+            PostArchiveMonth(year=row['month'].year, month=row['month'].month, post_count=row['post_count'])
+            for row in months
+        ]
+
+        with transaction.atomic():
+            PostArchiveMonth.objects.all().delete()
+            PostArchiveMonth.objects.bulk_create(archive)
+
+        self.stdout.write(self.style.SUCCESS(f'Zapisano {len(archive)} miesięcy archiwum.'))
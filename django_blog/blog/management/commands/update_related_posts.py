@@ -0,0 +1,96 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from blog import snapshots
+from blog.models import Post, PostFingerprint, RelatedPost
+from blog.similarity import TfidfIndex, content_hash, tokenize, top_k
+
+
+class Command(BaseCommand):
+    help = (
+        'Wylicza listy powiązanych postów (TF-IDF). Domyślnie przelicza tylko '
+        'posty zmienione od ostatniego uruchomienia i te, na które te zmiany wpływają.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=5)
+        parser.add_argument('--full', action='store_true', help='Przelicz wszystkie posty.')
+
+    def handle(self, *args, **options):
+        k = options['top_k']
+        posts = Post.objects.filter(published_date__lte=timezone.now()).values_list('pk', 'title', 'content')
+
+        documents = {}
+        hashes = {}
+        for pk, title, content in posts.iterator():
+            documents[pk] = tokenize(title, content)
+            hashes[pk] = content_hash(title, content)
+
+        stored = dict(PostFingerprint.objects.values_list('post_id', 'content_hash'))
+        changed = {pk for pk, digest in hashes.items() if stored.get(pk) != digest}
+        removed = set(stored) - set(hashes)
+
+        current = {}
+        for post_id, related_id in RelatedPost.objects.values_list('post_id', 'related_id'):
+            current.setdefault(post_id, set()).add(related_id)
+
+        index = TfidfIndex(documents)
+        lists = {}
+
+        if options['full']:
+            to_rebuild = set(documents)
+        else:
+            # Posty, których lista zawierała zmieniony lub usunięty post, liczymy
+            # od nowa; pozostałym tylko dokładamy zmienione posty, jeśli pasują.
+            to_rebuild = set(changed)
+            stale = changed | removed
+            for pk in documents.keys() - changed:
+                related = current.get(pk, set())
+                if related & stale or (removed and len(related) < k):
+                    to_rebuild.add(pk)
+
+            candidates = {}
+            for pk in changed:
+                for other_pk, score in index.similarities(pk).items():
+                    if other_pk not in to_rebuild:
+                        candidates.setdefault(other_pk, {})[pk] = score
+
+            if candidates:
+                scores = RelatedPost.objects.filter(post__in=candidates).values_list('post_id', 'related_id', 'score')
+                existing = {}
+                for post_id, related_id, score in scores:
+                    existing.setdefault(post_id, {})[related_id] = score
+                for pk, new_scores in candidates.items():
+                    merged = {**existing.get(pk, {}), **new_scores}
+                    lists[pk] = top_k(merged, k)
+
+        for pk in to_rebuild:
+            lists[pk] = top_k(index.similarities(pk), k)
+
+        with transaction.atomic():
+            RelatedPost.objects.filter(post__in=removed).delete()
+            RelatedPost.objects.filter(related__in=removed).delete()
+            RelatedPost.objects.filter(post__in=lists).delete()
+            RelatedPost.objects.bulk_create(
+                [
+                    RelatedPost(post_id=pk, related_id=related_id, score=score)
+                    for pk, neighbours in lists.items()
+                    for related_id, score in neighbours
+                ],
+                batch_size=1000,
+            )
+
+            PostFingerprint.objects.filter(post_id__in=removed | changed).delete()
+            PostFingerprint.objects.bulk_create(
+                [PostFingerprint(post_id=pk, content_hash=hashes[pk]) for pk in changed],
+                batch_size=1000,
+            )
+
+            if snapshots.enabled():
+                paths = snapshots.detail_paths(sorted(lists.keys() | removed))
+                transaction.on_commit(lambda: snapshots.invalidate(paths))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Zmienione posty: {len(changed)}, usunięte: {len(removed)}, zaktualizowane listy: {len(lists)}.'
+        ))
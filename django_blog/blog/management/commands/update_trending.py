@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import snapshots, trending
+from blog.cache import bump_version
+from blog.models import Comment, JobCheckpoint, Like, Post, TrendingRecount
+
+
+CHECKPOINT = 'update_trending'
+
+
+class Command(BaseCommand):
+    help = (
+        'Dolicza do wyniku "trending" polubienia i komentarze zatwierdzone od '
+        'ostatniego uruchomienia, a posty z cofniętymi zdarzeniami przelicza od '
+        'zera. Posty bez nowej aktywności nie są zmieniane.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--initial-days', type=int, default=7,
+            help='Zakres historii przy pierwszym uruchomieniu.'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now() - timedelta(seconds=trending.SETTLE_SECONDS)
+        checkpoint = JobCheckpoint.objects.filter(name=CHECKPOINT).first()
+        since = checkpoint.checkpoint if checkpoint else now - timedelta(days=options['initial_days'])
+
+        with transaction.atomic():
+            # Wiersze usuwamy przed odczytem zdarzeń - cofnięcie zatwierdzone
+            # w trakcie działania komendy doda wiersz ponownie.
+            recount = set(TrendingRecount.objects.values_list('post_id', flat=True))
+            TrendingRecount.objects.filter(post_id__in=recount).delete()
+
+            events = self.collect_events(since, now, exclude=recount)
+            for post_id, scores in self.collect_events(None, now, post_ids=recount).items():
+                events[post_id] = scores
+
+            changed = events.keys() | recount
+            posts = Post.objects.filter(pk__in=changed).only('id', 'trending_score')
+            for post in posts:
+                if post.pk in recount:
+                    post.trending_score = trending.add_scores(*events.get(post.pk, []))
+                else:
+                    post.trending_score = trending.add_scores(post.trending_score, *events[post.pk])
+            Post.objects.bulk_update(posts, ['trending_score'], batch_size=500)
+            JobCheckpoint.objects.update_or_create(name=CHECKPOINT, defaults={'checkpoint': now})
+
+        if changed:
+            bump_version('trending')
+            if snapshots.enabled():
+                snapshots.invalidate([reverse('post_list')])
+        self.stdout.write(self.style.SUCCESS(f'Zaktualizowano wynik {len(changed)} postów.'))
+
+    def collect_events(self, since, now, post_ids=None, exclude=()):
+        """Wyniki zdarzeń z przedziału (since, now] pogrupowane po id posta."""
+        likes = Like.objects.filter(created_date__lte=now)
+        comments = Comment.objects.filter(approved_comment=True, approved_date__lte=now)
+        if since is not None:
+            likes = likes.filter(created_date__gt=since)
+            comments = comments.filter(approved_date__gt=since)
+        if post_ids is not None:
+            if not post_ids:
+                return {}
+            likes = likes.filter(post_id__in=post_ids)
+            comments = comments.filter(post_id__in=post_ids)
+
+        events = {}
+        sources = [
+            (likes.values_list('post_id', 'created_date'), trending.LIKE_WEIGHT),
+            (comments.values_list('post_id', 'approved_date'), trending.COMMENT_WEIGHT),
+        ]
+        for rows, weight in sources:
+            for post_id, when in rows.iterator():
+                if post_id not in exclude:
+                    events.setdefault(post_id, []).append(trending.event_score(weight, when))
+        return events
@@ -0,0 +1,124 @@
+import cProfile
+import random
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+from . import health, profiling, routers, scheduling
+
+
+class PrimaryPinMiddleware:
+    """
+    Po żądaniu, które coś zapisało, ustawia krótkotrwałe ciasteczko; dopóki
+    jest ważne, odczyty tego klienta idą do bazy głównej zamiast do replik.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = settings.REPLICA_PIN_COOKIE in request.COOKIES
+        tokens = routers.start_request(pinned)
+        try:
+            response = self.get_response(request)
+            if routers.replicas_configured() and routers.wrote_to_primary():
+                response.set_cookie(
+                    settings.REPLICA_PIN_COOKIE,
+                    '1',
+                    max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True,
+                    samesite='Lax',
+                )
+        finally:
+            routers.end_request(tokens)
+        return response
+
+
+class HealthCheckMiddleware:
+    """
+    /healthz i /readyz są obsługiwane przed pozostałymi middleware'ami - bez
+    sesji, przekierowania na HTTPS i sprawdzania nagłówka Host.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path == '/healthz':
+            return health.liveness()
+        if request.path == '/readyz':
+            return health.readiness()
+        return self.get_response(request)
+
+
+class ScheduledPublishingMiddleware:
+    """
+    Gdy minie termin zaplanowanej publikacji, pierwsze żądanie unieważnia
+    cache i kopie statyczne opublikowanych postów. Poza tym momentem koszt
+    to jeden odczyt z cache.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if scheduling.is_due():
+            scheduling.publish_due()
+        return self.get_response(request)
+
+
+class ProfilingMiddleware:
+    """
+    Profiluje żądania z podpisanym tokenem (nagłówek X-Blog-Profile albo
+    ciasteczko blog_profile, wydawane na stronie /profiling/) oraz losową
+    próbkę PROFILING_SAMPLE_RATE. Przy PROFILING_ENABLED=False middleware
+    w ogóle nie jest ładowany.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.mode = settings.PROFILING_MODE
+        self.directory = Path(settings.PROFILING_DIR)
+
+    def should_profile(self, request):
+        token = request.META.get(profiling.HEADER) or request.COOKIES.get(profiling.COOKIE)
+        if token:
+            return profiling.valid_token(token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        started_at = timezone.now()
+        if self.mode == 'sample':
+            profiler = profiling.StackSampler()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            duration = time.perf_counter() - started
+            if self.mode == 'sample':
+                profiler.stop()
+            else:
+                profiler.disable()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = profiling.profile_name(started_at, duration, request)
+        path = self.directory / f'{name}.{profiling.EXTENSIONS[self.mode]}'
+        if self.mode == 'sample':
+            profiler.dump(path)
+        else:
+            profiler.dump_stats(path)
+        profiling.prune(self.directory, settings.PROFILING_KEEP)
+        return response
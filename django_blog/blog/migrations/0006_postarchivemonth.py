@@ -0,0 +1,26 @@
+# Generated by Django 4.0.3 on 2026-10-19 10:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_related_posts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostArchiveMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('-year', '-month'),
+                'unique_together': {('year', 'month')},
+            },
+        ),
+    ]
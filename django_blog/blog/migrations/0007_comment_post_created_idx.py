@@ -0,0 +1,17 @@
+# Generated by Django 4.0.3 on 2026-10-19 10:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_postarchivemonth'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created_date', 'id'], name='blog_comment_post_created_idx'),
+        ),
+    ]
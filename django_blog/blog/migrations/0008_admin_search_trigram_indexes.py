@@ -0,0 +1,47 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# Wyszukiwanie w adminie (icontains) na Postgresie generuje
+# UPPER(kolumna) LIKE UPPER('%...%') - indeks trigramowy GIN na UPPER(kolumna)
+# pozwala je obsłużyć bez skanowania całej tabeli.
+#
+# CREATE EXTENSION pg_trgm wymaga superużytkownika, a od PostgreSQL 13
+# (pg_trgm jest rozszerzeniem "trusted") wystarcza prawo CREATE w bazie.
+# Jeśli rola aplikacji nie ma żadnego z nich, administrator wykonuje raz
+# `CREATE EXTENSION pg_trgm;` - TrigramExtension pomija już zainstalowane
+# rozszerzenie. Indeks na auth_user.username tworzy aplikacja users.
+TRIGRAM_INDEXES = [
+    ('blog_post_title_trgm_idx', 'blog_post', 'title'),
+    ('blog_post_content_trgm_idx', 'blog_post', 'content'),
+    ('blog_comment_text_trgm_idx', 'blog_comment', 'text'),
+    ('blog_newsletter_email_trgm_idx', 'blog_newsletter', 'email'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_comment_post_created_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
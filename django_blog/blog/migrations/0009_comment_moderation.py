@@ -0,0 +1,45 @@
+# Generated by Django 4.0.3 on 2026-10-19 10:37
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def approve_existing_comments(apps, schema_editor):
+    # Dotychczasowe komentarze były widoczne bez moderacji - zostają widoczne.
+    Comment = apps.get_model('blog', 'Comment')
+    Post = apps.get_model('blog', 'Post')
+    Comment.objects.update(approved_comment=True)
+    counts = (
+        Comment.objects.filter(post=OuterRef('pk'), approved_comment=True)
+        .order_by()
+        .values('post')
+        .annotate(count=Count('*'))
+        .values('count')
+    )
+    Post.objects.update(comment_count=Coalesce(Subquery(counts, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_admin_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='rejected_comment',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('approved_comment', False), ('rejected_comment', False)), fields=['created_date', 'id'], name='blog_comment_pending_idx'),
+        ),
+        migrations.RunPython(approve_existing_comments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.0.3 on 2026-10-19 10:41
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_trending_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaleSnapshot',
+            fields=[
+                ('path', models.CharField(max_length=200, primary_key=True, serialize=False)),
+                ('queued_date', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
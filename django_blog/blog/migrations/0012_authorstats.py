@@ -0,0 +1,54 @@
+# Generated by Django 4.0.3 on 2026-10-19 10:50
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_author_stats(apps, schema_editor):
+    AuthorStats = apps.get_model('blog', 'AuthorStats')
+    Like = apps.get_model('blog', 'Like')
+    Post = apps.get_model('blog', 'Post')
+
+    def total(queryset, group_by, aggregate=Count('*')):
+        rows = queryset.order_by().values(group_by).annotate(total=aggregate).values('total')
+        return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+    author_ids = Post.objects.order_by().values_list('author_id', flat=True).distinct()
+    AuthorStats.objects.bulk_create([AuthorStats(author_id=pk) for pk in author_ids], batch_size=1000)
+    posts = Post.objects.filter(author=OuterRef('author_id'))
+    AuthorStats.objects.update(
+        post_count=total(posts.filter(published_date__isnull=False), 'author'),
+        like_count=total(Like.objects.filter(post__author=OuterRef('author_id')), 'post__author'),
+        comment_count=total(posts, 'author', Sum('comment_count')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('blog', '0011_stalesnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='author_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('like_count', models.PositiveIntegerField(default=0)),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'author stats',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', 'published_date', 'id'], name='blog_post_author_pub_idx'),
+        ),
+        migrations.RunPython(fill_author_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def recount_published_posts(apps, schema_editor):
+    # Od teraz Tag.post_count liczy tylko opublikowane posty.
+    Tag = apps.get_model('blog', 'Tag')
+    Post = apps.get_model('blog', 'Post')
+    links = (
+        Post.tags.through.objects.filter(tag=OuterRef('pk'), post__published_date__lte=timezone.now())
+        .order_by()
+        .values('tag')
+        .annotate(count=Count('*'))
+        .values('count')
+    )
+    Tag.objects.update(post_count=Coalesce(Subquery(links, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_authorstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_published_posts, migrations.RunPython.noop),
+    ]
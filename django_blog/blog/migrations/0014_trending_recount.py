@@ -0,0 +1,34 @@
+# Generated by Django 4.0.3 on 2026-10-19 11:02
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def backfill_approved_date(apps, schema_editor):
+    # Moment zatwierdzenia starszych komentarzy nie jest znany - przyjmujemy datę dodania.
+    Comment = apps.get_model('blog', 'Comment')
+    Comment.objects.filter(approved_comment=True).update(approved_date=F('created_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_live_tag_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingRecount',
+            fields=[
+                ('post_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('queued_date', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='approved_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_approved_date, migrations.RunPython.noop),
+    ]
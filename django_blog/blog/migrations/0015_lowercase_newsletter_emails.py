@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def lowercase_emails(apps, schema_editor):
+    # Starsze wiersze zapisywano z oryginalną wielkością liter, przez co
+    # wypisanie ich nie znajdowało, a import dodawał duplikaty.
+    Newsletter = apps.get_model('blog', 'Newsletter')
+    duplicated = (
+        Newsletter.objects.annotate(normalized=Lower('email'))
+        .values('normalized')
+        .annotate(count=Count('*'))
+        .filter(count__gt=1)
+        .values_list('normalized', flat=True)
+    )
+    for email in list(duplicated):
+        # Zostaje najstarsza aktywna subskrypcja (albo najstarsza, jeśli żadna nie jest aktywna).
+        subscribers = Newsletter.objects.filter(email__iexact=email).order_by('-is_active', 'subscribed_date', 'pk')
+        keep = subscribers.first()
+        subscribers.exclude(pk=keep.pk).delete()
+    Newsletter.objects.exclude(email=Lower('email')).update(email=Lower('email'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_trending_recount'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def recount_published_posts(apps, schema_editor):
+    # Od teraz PostArchiveMonth liczy tylko opublikowane posty, bez zaplanowanych.
+    Post = apps.get_model('blog', 'Post')
+    PostArchiveMonth = apps.get_model('blog', 'PostArchiveMonth')
+    months = (
+        Post.objects.filter(published_date__lte=timezone.now())
+        .annotate(month=TruncMonth('published_date'))
+        .values('month')
+        .annotate(post_count=Count('id'))
+        .order_by()
+    )
+    PostArchiveMonth.objects.all().delete()
+    PostArchiveMonth.objects.bulk_create([
+        PostArchiveMonth(year=row['month'].year, month=row['month'].month, post_count=row['post_count'])
+        for row in months
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_lowercase_newsletter_emails'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_published_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def recount_published_posts(apps, schema_editor):
+    # Od teraz AuthorStats.post_count liczy tylko opublikowane posty, bez zaplanowanych.
+    AuthorStats = apps.get_model('blog', 'AuthorStats')
+    Post = apps.get_model('blog', 'Post')
+    posts = (
+        Post.objects.filter(author=OuterRef('author_id'), published_date__lte=timezone.now())
+        .order_by()
+        .values('author')
+        .annotate(count=Count('*'))
+        .values('count')
+    )
+    AuthorStats.objects.update(post_count=Coalesce(Subquery(posts, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_live_archive_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_published_posts, migrations.RunPython.noop),
+    ]
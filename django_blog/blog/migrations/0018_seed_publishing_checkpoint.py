@@ -0,0 +1,20 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def seed_checkpoint(apps, schema_editor):
+    # Posty opublikowane do tej chwili są już policzone (0013, 0016, 0017);
+    # scheduling.publish_due zajmie się tymi, których termin jeszcze nie minął.
+    JobCheckpoint = apps.get_model('blog', 'JobCheckpoint')
+    JobCheckpoint.objects.get_or_create(name='scheduled_publishing', defaults={'checkpoint': timezone.now()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_live_author_post_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_checkpoint, migrations.RunPython.noop),
+    ]
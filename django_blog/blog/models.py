@@ -1,30 +1,180 @@
+from datetime import datetime
+
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+class Tag(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    slug = models.SlugField(max_length=50, unique=True)
+    # Liczba opublikowanych postów z tym tagiem, aktualizowana przez sygnały
+    # (blog/signals.py) i publikację zaplanowanych postów (blog/scheduling.py).
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        ordering = ('name',)
+        indexes = [
+            models.Index(fields=['-post_count', 'name'], name='blog_tag_popular_idx'),
+        ]
+
+    @classmethod
+    def popular(cls, limit=10):
+        return cls.objects.filter(post_count__gt=0).order_by('-post_count', 'name')[:limit]
+
+    @classmethod
+    def refresh_counts(cls, tag_ids, now=None):
+        links = (
+            Post.tags.through.objects.filter(tag=OuterRef('pk'), post__published_date__lte=now or timezone.now())
+            .order_by()
+            .values('tag')
+            .annotate(count=Count('*'))
+            .values('count')
+        )
+        cls.objects.filter(pk__in=tag_ids).update(
+            post_count=Coalesce(Subquery(links, output_field=IntegerField()), 0)
+        )
+
+    def __str__(self):
+        return self.name
+
 class Post(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     created_date = models.DateTimeField(default=timezone.now)
     published_date = models.DateTimeField(blank=True, null=True)
+    tags = models.ManyToManyField(Tag, blank=True, related_name='posts')
+    # Liczba zatwierdzonych komentarzy, aktualizowana przez sygnały i moderację.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Logarytm wygaszanego wyniku aktywności, patrz blog/trending.py.
+    trending_score = models.FloatField(blank=True, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['published_date', 'id'], name='blog_post_published_idx'),
+            models.Index(fields=['-trending_score'], name='blog_post_trending_idx'),
+            models.Index(fields=['author', 'published_date', 'id'], name='blog_post_author_pub_idx'),
+        ]
 
     def publish(self):
         self.published_date = timezone.now()
         self.save()
 
+    def is_published(self):
+        return self.published_date is not None and self.published_date <= timezone.now()
+
     def __str__(self):
         return self.title
 
+class PostArchiveMonth(models.Model):
+    # Liczba opublikowanych postów w miesiącu (czas lokalny), aktualizowana
+    # przez sygnały i publikację zaplanowanych postów (blog/scheduling.py);
+    # pełne przeliczenie: rebuild_post_archive.
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ('-year', '-month')
+        unique_together = ('year', 'month')
+
+    @classmethod
+    def refresh_counts(cls, months, now=None):
+        """Przelicza od zera podane miesiące (pary rok, miesiąc)."""
+        now = now or timezone.now()
+        for year, month in set(months):
+            start = timezone.make_aware(datetime(year, month, 1))
+            end = timezone.make_aware(datetime(year + month // 12, month % 12 + 1, 1))
+            count = Post.objects.filter(
+                published_date__gte=start, published_date__lt=end, published_date__lte=now
+            ).count()
+            cls.objects.update_or_create(year=year, month=month, defaults={'post_count': count})
+
+    def __str__(self):
+        return f'{self.year}-{self.month:02d}'
+
+class AuthorStats(models.Model):
+    # Liczniki autora: opublikowane posty oraz polubienia i zatwierdzone
+    # komentarze pod jego postami. Aktualizowane przez sygnały, moderację i
+    # publikację zaplanowanych postów; pełne przeliczenie: rebuild_author_stats.
+    author = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='author_stats')
+    post_count = models.PositiveIntegerField(default=0)
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'author stats'
+
+    def __str__(self):
+        return f'{self.author_id}: {self.post_count} / {self.like_count} / {self.comment_count}'
+
+class JobCheckpoint(models.Model):
+    # Moment, do którego zadanie okresowe przetworzyło dane.
+    name = models.CharField(max_length=50, primary_key=True)
+    checkpoint = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.name}: {self.checkpoint}'
+
+class StaleSnapshot(models.Model):
+    # Ścieżka strony, której statyczna kopia (blog/snapshots.py) wymaga odbudowania.
+    path = models.CharField(max_length=200, primary_key=True)
+    queued_date = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.path
+
+class TrendingRecount(models.Model):
+    # Post, którego wynik "trending" trzeba przeliczyć od zera, bo zniknęło
+    # zdarzenie już w nim uwzględnione (cofnięte polubienie, wycofany komentarz).
+    # Bez klucza obcego - wiersz może powstać w trakcie usuwania posta.
+    post_id = models.BigIntegerField(primary_key=True)
+    queued_date = models.DateTimeField(default=timezone.now)
+
+class RelatedPost(models.Model):
+    # Wypełniane przez komendę update_related_posts.
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_posts')
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ('-score',)
+        unique_together = ('post', 'related')
+        indexes = [
+            models.Index(fields=['post', '-score'], name='blog_related_post_score_idx'),
+        ]
+
+class PostFingerprint(models.Model):
+    # Celowo bez klucza obcego: wiersz przeżywa usunięcie posta, dzięki czemu
+    # update_related_posts wie, które posty zniknęły od ostatniego uruchomienia.
+    post_id = models.BigIntegerField(primary_key=True)
+    content_hash = models.CharField(max_length=40)
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     text = models.TextField()
     created_date = models.DateTimeField(default=timezone.now)
     approved_comment = models.BooleanField(default=False)
+    rejected_comment = models.BooleanField(default=False)
+    # Moment zatwierdzenia - od niego liczy się wkład komentarza w wynik "trending".
+    approved_date = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created_date', 'id'], name='blog_comment_post_created_idx'),
+            models.Index(
+                fields=['created_date', 'id'],
+                condition=models.Q(approved_comment=False, rejected_comment=False),
+                name='blog_comment_pending_idx'
+            ),
+        ]
 
     def approve(self):
         self.approved_comment = True
+        self.rejected_comment = False
         self.save()
 
     def __str__(self):
@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import authors, events, snapshots, trending
+from .cache import bump_version, touch_post
+from .models import Comment, Post
+
+
+def approved_comment_count():
+    counts = (
+        Comment.objects.filter(post=OuterRef('pk'), approved_comment=True)
+        .order_by()
+        .values('post')
+        .annotate(count=Count('*'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def refresh_comment_counts(post_ids):
+    Post.objects.filter(pk__in=post_ids).update(comment_count=approved_comment_count())
+
+
+def moderate_comments(comment_ids, approve):
+    """
+    Zatwierdza albo odrzuca komentarze jednym UPDATE ... WHERE id IN (...),
+    po czym jednym UPDATE przelicza liczniki dotkniętych postów. Zwraca
+    liczbę zmienionych komentarzy.
+    """
+    with transaction.atomic():
+        comments = Comment.objects.filter(pk__in=comment_ids)
+        posts = set(comments.order_by().values_list('post_id', 'post__author_id').distinct())
+        post_ids = {post_id for post_id, _ in posts}
+        if approve:
+            # Komentarz zatwierdzony już wcześniej zachowuje swoją datę zatwierdzenia.
+            approved_date = Coalesce(F('approved_date'), Value(timezone.now()))
+        else:
+            approved_date = None
+            trending.queue_recount(post_ids)
+        updated = comments.update(
+            approved_comment=approve, rejected_comment=not approve, approved_date=approved_date
+        )
+        refresh_comment_counts(post_ids)
+        authors.refresh_author_comment_counts({author_id for _, author_id in posts})
+
+        # Zapis z pominięciem save() nie wywołuje sygnałów - unieważniamy ręcznie.
+        for post_id in post_ids:
+            touch_post(post_id)
+            bump_version(f'comments:{post_id}')
+        transaction.on_commit(lambda: [events.publish_counts(post_id) for post_id in post_ids])
+        if snapshots.enabled():
+            paths = {path for post_id in post_ids for path in snapshots.post_paths(post_id)}
+            transaction.on_commit(lambda: snapshots.invalidate(paths))
+
+    return updated
@@ -0,0 +1,57 @@
+import csv
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+
+def normalize_email(value):
+    """Zwraca adres w postaci kanonicznej albo None, jeśli jest niepoprawny."""
+    email = (value or '').strip().lower()
+    try:
+        validate_email(email)
+    except ValidationError:
+        return None
+    return email
+
+
+def read_emails(stream, column='email'):
+    """
+    Strumieniowo czyta adresy z CSV (kolumna `column` albo pierwsza, jeśli
+    plik nie ma nagłówka). Zwraca (poprawne adresy bez powtórzeń, liczniki),
+    gdzie liczniki są uzupełniane w trakcie iteracji.
+    """
+    stats = {'rows': 0, 'invalid': 0, 'duplicates': 0}
+
+    def emails():
+        reader = csv.reader(stream)
+        seen = set()
+        index = 0
+        for row_number, row in enumerate(reader):
+            if row_number == 0:
+                header = [cell.strip().lower() for cell in row]
+                if column in header:
+                    index = header.index(column)
+                    continue
+            if not row:
+                continue
+            stats['rows'] += 1
+            email = normalize_email(row[index] if index < len(row) else '')
+            if email is None:
+                stats['invalid'] += 1
+            elif email in seen:
+                stats['duplicates'] += 1
+            else:
+                seen.add(email)
+                yield email
+
+    return emails(), stats
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,86 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+CURSOR_DATE_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+def encode_cursor(value, pk):
+    value = value.astimezone(dt_timezone.utc)
+    return f'{value.strftime(CURSOR_DATE_FORMAT)}.{pk}'
+
+
+def decode_cursor(cursor):
+    try:
+        value, pk = cursor.split('.')
+        value = datetime.strptime(value, CURSOR_DATE_FORMAT).replace(tzinfo=dt_timezone.utc)
+        return value, int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def keyset_page(queryset, cursor=None, per_page=10, field='published_date'):
+    """
+    Stronicowanie po (field, id) malejąco. Zamiast OFFSET filtruje po kluczu
+    ostatniego wyświetlonego wiersza, więc koszt każdej strony jest taki sam
+    i korzysta z indeksu na (field, id).
+
+    Działa zarówno dla obiektów, jak i dla słowników z values() - wtedy
+    field i 'id' muszą być wśród pobieranych kolumn.
+
+    Zwraca (wiersze, kursor następnej strony albo None).
+    """
+    queryset = queryset.order_by(f'-{field}', '-id')
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        value, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk})
+        )
+
+    rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        last = rows[per_page - 1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last[field], last['id'])
+        else:
+            next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return rows[:per_page], next_cursor
+
+
+def estimated_count(queryset):
+    """
+    Przybliżona liczba wierszy tabeli ze statystyk Postgresa (pg_class), bez
+    skanowania tabeli. None dla innych baz.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Dla list bez filtrów powyżej ESTIMATED_COUNT_THRESHOLD wierszy podaje
+    szacunek z pg_class zamiast COUNT(*) po całej tabeli.
+    """
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate > settings.ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
@@ -0,0 +1,112 @@
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+HEADER = 'HTTP_X_BLOG_PROFILE'
+COOKIE = 'blog_profile'
+SALT = 'blog.profiling'
+TOKEN_MAX_AGE = 24 * 60 * 60
+
+EXTENSIONS = {'cprofile': 'prof', 'sample': 'collapsed'}
+FILE_NAME = re.compile(
+    r'^(?P<started>\d{8}-\d{6}-\d{6})_(?P<duration>\d+)ms_(?P<method>[A-Z]+)_(?P<name>[\w.:-]+)'
+    r'\.(?P<extension>prof|collapsed)$'
+)
+
+
+def make_token(user):
+    return signing.dumps({'user': user.pk}, salt=SALT)
+
+
+def valid_token(value):
+    try:
+        signing.loads(value, salt=SALT, max_age=TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+class StackSampler:
+    """
+    Co `interval` sekund zapisuje stos wątku obsługującego żądanie. Wynik to
+    format "collapsed" (ramka;ramka;... liczba) dla flamegraph.pl/speedscope.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name='profiling-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}')
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as output:
+            for stack, count in self.samples.most_common():
+                output.write(f'{stack} {count}\n')
+
+
+def profile_name(started, duration, request):
+    match = getattr(request, 'resolver_match', None)
+    name = match.view_name if match else 'unresolved'
+    name = re.sub(r'[^\w.:-]', '_', name)
+    return f'{started:%Y%m%d-%H%M%S-%f}_{round(duration * 1000)}ms_{request.method}_{name}'
+
+
+def prune(directory, keep):
+    files = sorted(directory.iterdir(), key=lambda path: path.name, reverse=True)
+    for path in [path for path in files if FILE_NAME.match(path.name)][keep:]:
+        path.unlink(missing_ok=True)
+
+
+def list_profiles(name=None):
+    """Zapisane profile od najnowszego; opcjonalnie tylko dla danej nazwy URL."""
+    directory = Path(settings.PROFILING_DIR)
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for path in directory.iterdir():
+        match = FILE_NAME.match(path.name)
+        if match is None or (name and match['name'] != name):
+            continue
+        profiles.append({
+            'file': path.name,
+            'started': datetime.strptime(match['started'], '%Y%m%d-%H%M%S-%f').replace(tzinfo=dt_timezone.utc),
+            'duration_ms': int(match['duration']),
+            'method': match['method'],
+            'name': match['name'],
+            'format': match['extension'],
+        })
+    profiles.sort(key=lambda profile: profile['file'], reverse=True)
+    return profiles
+
+
+def profile_path(file_name):
+    if not FILE_NAME.match(file_name):
+        return None
+    path = Path(settings.PROFILING_DIR) / file_name
+    return path if path.is_file() else None
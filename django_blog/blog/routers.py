@@ -0,0 +1,62 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+PRIMARY_DB = 'default'
+
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+_wrote_to_primary = ContextVar('wrote_to_primary', default=False)
+
+
+def start_request(pinned=False):
+    """Resetuje stan routera na początku żądania i zwraca tokeny do end_request()."""
+    return _pinned_to_primary.set(pinned), _wrote_to_primary.set(False)
+
+
+def end_request(tokens):
+    pinned_token, wrote_token = tokens
+    _pinned_to_primary.reset(pinned_token)
+    _wrote_to_primary.reset(wrote_token)
+
+
+def pin_to_primary():
+    """Kolejne odczyty w tym żądaniu trafią do bazy głównej."""
+    _pinned_to_primary.set(True)
+    _wrote_to_primary.set(True)
+
+
+def wrote_to_primary():
+    return _wrote_to_primary.get()
+
+
+def replicas_configured():
+    return bool(getattr(settings, 'REPLICA_WEIGHTS', None))
+
+
+class PrimaryReplicaRouter:
+    """
+    Odczyty idą do replik (losowo, według wag z REPLICA_WEIGHTS), zapisy
+    do bazy głównej. Po zapisie odczyty w tym żądaniu - i przez
+    REPLICA_PIN_SECONDS w kolejnych, patrz PrimaryPinMiddleware - zostają
+    na bazie głównej, żeby użytkownik nie zobaczył nieaktualnych danych.
+    """
+
+    def db_for_read(self, model, **hints):
+        weights = getattr(settings, 'REPLICA_WEIGHTS', None)
+        if not weights or _pinned_to_primary.get():
+            return PRIMARY_DB
+        aliases = list(weights)
+        return random.choices(aliases, weights=[weights[alias] for alias in aliases])[0]
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Repliki mają te same dane co baza główna.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY_DB
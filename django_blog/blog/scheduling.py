@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from . import snapshots
+from .cache import bump_version, touch_post
+
+NEXT_PUBLISH_KEY = 'blog:scheduled:next'
+NOTHING_SCHEDULED = 'none'
+# Zabezpieczenie na wypadek wyścigu przy zapisie klucza - nie wpływa na
+# ważność samych danych, te są unieważniane w momencie publikacji.
+NEXT_PUBLISH_TIMEOUT = 600
+
+CHECKPOINT = 'scheduled_publishing'
+
+
+def _checkpoint():
+    # Zwykły odczyt - wywoływane przy żądaniach GET, które nie powinny pisać
+    # do bazy. Wiersz zakłada migracja 0018; bez niego (None) nie ma dolnej
+    # granicy i publish_due raz przeliczy wszystkie opublikowane posty.
+    from .models import JobCheckpoint
+
+    return JobCheckpoint.objects.filter(name=CHECKPOINT).values_list('checkpoint', flat=True).first()
+
+
+def next_publish_time():
+    """
+    Najbliższy moment, w którym opublikowany zostanie zaplanowany post, albo
+    None. Do tej chwili listy postów zmieniają się tylko przez zapisy, które
+    same unieważniają cache. Liczone od ostatniego punktu kontrolnego, nie od
+    "teraz" - post, którego termin minął przed przeliczeniem klucza (wygasł,
+    inny worker ma własny cache), nadal czeka na publish_due.
+    """
+    value = cache.get(NEXT_PUBLISH_KEY)
+    if value is None:
+        from .models import Post
+
+        posts = Post.objects.filter(published_date__isnull=False)
+        checkpoint = _checkpoint()
+        if checkpoint is not None:
+            posts = posts.filter(published_date__gt=checkpoint)
+        value = posts.aggregate(next=Min('published_date'))['next'] or NOTHING_SCHEDULED
+        cache.set(NEXT_PUBLISH_KEY, value, NEXT_PUBLISH_TIMEOUT)
+    return None if value == NOTHING_SCHEDULED else value
+
+
+def reschedule():
+    cache.delete(NEXT_PUBLISH_KEY)
+
+
+def is_due(now=None):
+    next_time = next_publish_time()
+    return next_time is not None and next_time <= (now or timezone.now())
+
+
+def publish_due(now=None):
+    """
+    Przelicza liczniki i unieważnia cache, ETagi API i kopie statyczne
+    postów, których data publikacji właśnie minęła. Zwraca listę ich id.
+    """
+    from .authors import refresh_author_stats
+    from .models import JobCheckpoint, Post, PostArchiveMonth, Tag
+
+    next_time = next_publish_time()
+    if next_time is None or next_time > (now or timezone.now()):
+        return []
+
+    with transaction.atomic():
+        # Bez wiersza next_publish_time nie ma dolnej granicy, więc przed
+        # next_time nie czeka żaden post.
+        JobCheckpoint.objects.get_or_create(
+            name=CHECKPOINT, defaults={'checkpoint': next_time - timedelta(microseconds=1)})
+        checkpoint = JobCheckpoint.objects.select_for_update().get(name=CHECKPOINT)
+        # "Teraz" odczytujemy dopiero po zablokowaniu wiersza - wolniejsze
+        # równoległe wywołanie nie może cofnąć punktu kontrolnego.
+        now = max(now or timezone.now(), checkpoint.checkpoint)
+        posts = {
+            pk: (published_date, author_id)
+            for pk, published_date, author_id in
+            Post.objects.filter(published_date__gt=checkpoint.checkpoint, published_date__lte=now)
+            .values_list('pk', 'published_date', 'author_id')
+        }
+        checkpoint.checkpoint = now
+        checkpoint.save(update_fields=['checkpoint'])
+
+        post_ids = list(posts)
+        if post_ids:
+            Tag.refresh_counts(Tag.objects.filter(posts__in=post_ids).values_list('pk', flat=True), now)
+            months = [timezone.localtime(published_date) for published_date, _ in posts.values()]
+            PostArchiveMonth.refresh_counts([(month.year, month.month) for month in months], now)
+            refresh_author_stats({author_id for _, author_id in posts.values()}, now)
+            for post_id in post_ids:
+                touch_post(post_id)
+            bump_version('trending')
+            if snapshots.enabled():
+                paths = sorted({path for post_id in post_ids for path in snapshots.post_paths(post_id)})
+                transaction.on_commit(lambda: snapshots.invalidate(paths))
+
+    reschedule()
+    return post_ids
@@ -0,0 +1,392 @@
+from contextvars import ContextVar
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import authors, events, scheduling, snapshots, trending
+from .cache import bump_version, touch_object, touch_post
+from .models import Comment, Like, Post, PostArchiveMonth, RelatedPost, Tag
+
+
+def _is_live(published_date):
+    return published_date is not None and published_date <= timezone.now()
+
+
+def _decrement(field, delta):
+    # Liczniki są nieujemne - rozjechany licznik nie może blokować zapisu.
+    return Greatest(F(field) - delta, 0)
+
+
+# Posty i autorzy usuwani w bieżącym delete() - Django wysyła wszystkie
+# pre_delete przed pierwszym post_delete. Kaskadowo usuwane polubienia i
+# komentarze nie zmieniają wtedy liczników pojedynczo: post odejmuje swoje
+# sumy od statystyk autora raz, a usuwany autor traci je razem z wierszem.
+_deleting = ContextVar('blog_deleting', default=frozenset())
+
+
+def _being_deleted(kind, pk):
+    return (kind, pk) in _deleting.get()
+
+
+def _post_being_deleted(instance):
+    return _being_deleted('post', instance.post_id)
+
+
+@receiver(pre_delete, sender=Post)
+@receiver(pre_delete, sender=User)
+def remember_deleted_object(sender, instance, **kwargs):
+    kind = 'post' if sender is Post else 'author'
+    _deleting.set(_deleting.get() | {(kind, instance.pk)})
+
+
+def _linked_live_rows(sender, instance, reverse, pk_set):
+    if reverse:
+        rows = sender.objects.filter(tag=instance)
+        if pk_set is not None:
+            rows = rows.filter(post__in=pk_set)
+    else:
+        rows = sender.objects.filter(post=instance)
+        if pk_set is not None:
+            rows = rows.filter(tag__in=pk_set)
+    return rows.filter(post__published_date__lte=timezone.now())
+
+
+def _change_tag_counts(instance, reverse, pks, delta):
+    if reverse:
+        tags = Tag.objects.filter(pk=instance.pk)
+        delta *= len(pks)
+    else:
+        tags = Tag.objects.filter(pk__in=pks)
+    tags.update(post_count=F('post_count') + delta if delta > 0 else _decrement('post_count', -delta))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_tag_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    # Liczone są tylko opublikowane posty; publikację i jej cofnięcie obsługuje
+    # update_tag_counts_on_publish, zaplanowane posty - scheduling.publish_due.
+    if not reverse and not instance.is_published():
+        return
+    column = 'post_id' if reverse else 'tag_id'
+    if action in ('pre_remove', 'pre_clear'):
+        # Przy remove() Django przekazuje żądane pk, nie tylko istniejące
+        # powiązania - liczymy tylko te, które naprawdę zostaną usunięte.
+        rows = _linked_live_rows(sender, instance, reverse, pk_set)
+        instance._tag_pks_to_unlink = set(rows.values_list(column, flat=True))
+    elif action in ('post_remove', 'post_clear'):
+        pks = getattr(instance, '_tag_pks_to_unlink', set())
+        if pks:
+            _change_tag_counts(instance, reverse, pks, -1)
+        instance._tag_pks_to_unlink = set()
+    elif action == 'post_add' and pk_set:
+        if reverse:
+            pk_set = set(Post.objects.filter(pk__in=pk_set, published_date__lte=timezone.now())
+                         .values_list('pk', flat=True))
+        if pk_set:
+            _change_tag_counts(instance, reverse, pk_set, 1)
+
+
+# Sygnały post_init czytają __dict__, żeby nie doczytywać pól odroczonych przez only()/defer().
+UNKNOWN = object()
+
+
+@receiver(post_init, sender=Post)
+def remember_publication_state(sender, instance, **kwargs):
+    if 'published_date' in instance.__dict__:
+        instance._was_live = _is_live(instance.published_date)
+    else:
+        instance._was_live = UNKNOWN
+
+
+@receiver(post_save, sender=Post)
+def update_tag_counts_on_publish(sender, instance, created, **kwargs):
+    was_live = False if created else instance._was_live
+    if was_live is UNKNOWN:
+        return
+    is_live = _is_live(instance.published_date)
+    if is_live != was_live:
+        tags = Tag.objects.filter(posts=instance)
+        tags.update(post_count=F('post_count') + 1 if is_live else _decrement('post_count', 1))
+    instance._was_live = is_live
+
+
+@receiver(pre_delete, sender=Post)
+def decrement_tag_counts_on_post_delete(sender, instance, **kwargs):
+    if instance._was_live is True:
+        Tag.objects.filter(posts=instance).update(post_count=_decrement('post_count', 1))
+
+
+def _archive_month(published_date):
+    # Miesiąc, w którym post jest liczony - zaplanowane posty jeszcze w żadnym.
+    if not _is_live(published_date):
+        return None
+    published_date = timezone.localtime(published_date)
+    return published_date.year, published_date.month
+
+
+def _change_archive_count(month, delta):
+    year, month = month
+    archive_month, _ = PostArchiveMonth.objects.get_or_create(year=year, month=month)
+    PostArchiveMonth.objects.filter(pk=archive_month.pk).update(
+        post_count=F('post_count') + delta if delta > 0 else _decrement('post_count', -delta)
+    )
+
+
+@receiver(post_init, sender=Post)
+def remember_archive_month(sender, instance, **kwargs):
+    if 'published_date' in instance.__dict__:
+        instance._archive_month = _archive_month(instance.published_date)
+    else:
+        instance._archive_month = UNKNOWN
+
+
+@receiver(post_save, sender=Post)
+def update_archive_on_save(sender, instance, created, **kwargs):
+    old_month = None if created else instance._archive_month
+    if old_month is UNKNOWN:
+        return
+    new_month = _archive_month(instance.published_date)
+    if old_month != new_month:
+        if old_month:
+            _change_archive_count(old_month, -1)
+        if new_month:
+            _change_archive_count(new_month, 1)
+        instance._archive_month = new_month
+
+
+@receiver(post_delete, sender=Post)
+def update_archive_on_delete(sender, instance, **kwargs):
+    if instance._archive_month and instance._archive_month is not UNKNOWN:
+        _change_archive_count(instance._archive_month, -1)
+
+
+@receiver(post_init, sender=Comment)
+def remember_comment_approval(sender, instance, **kwargs):
+    instance._was_approved = instance.__dict__.get('approved_comment', UNKNOWN)
+
+
+@receiver(pre_save, sender=Comment)
+def stamp_comment_approval(sender, instance, **kwargs):
+    # Zbiorcza moderacja (moderate_comments) ustawia datę sama w UPDATE.
+    if not instance.approved_comment:
+        instance.approved_date = None
+    elif instance.approved_date is None:
+        instance.approved_date = timezone.now()
+
+
+def _change_comment_count(comment, delta):
+    Post.objects.filter(pk=comment.post_id).update(comment_count=F('comment_count') + delta)
+    author_id = authors.post_author_id(comment)
+    if author_id is not None:
+        authors.change_author_stats(author_id, comment_count=delta)
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_count_on_save(sender, instance, created, **kwargs):
+    was_approved = False if created else instance._was_approved
+    if was_approved is UNKNOWN:
+        return
+    if instance.approved_comment != was_approved:
+        _change_comment_count(instance, 1 if instance.approved_comment else -1)
+        if was_approved:
+            trending.queue_recount([instance.post_id])
+        instance._was_approved = instance.approved_comment
+
+
+@receiver(post_delete, sender=Comment)
+def update_comment_count_on_delete(sender, instance, **kwargs):
+    if instance._was_approved is True and not _post_being_deleted(instance):
+        _change_comment_count(instance, -1)
+        trending.queue_recount([instance.post_id])
+
+
+@receiver(post_init, sender=Post)
+def remember_author_stats_state(sender, instance, **kwargs):
+    if 'author_id' in instance.__dict__ and 'published_date' in instance.__dict__:
+        instance._author_stats_state = (instance.author_id, _is_live(instance.published_date))
+    else:
+        instance._author_stats_state = UNKNOWN
+
+
+@receiver(post_save, sender=Post)
+def update_author_stats_on_save(sender, instance, created, **kwargs):
+    # Zaplanowane posty dolicza scheduling.publish_due, gdy staną się widoczne.
+    old_state = (instance.author_id, False) if created else instance._author_stats_state
+    if old_state is UNKNOWN:
+        return
+    new_state = (instance.author_id, _is_live(instance.published_date))
+    old_author_id, was_counted = old_state
+    if old_author_id != instance.author_id:
+        # Post zmienił autora - razem z nim przechodzą polubienia i komentarze.
+        authors.refresh_author_stats([old_author_id, instance.author_id])
+    elif was_counted != new_state[1]:
+        authors.change_author_stats(instance.author_id, post_count=1 if new_state[1] else -1)
+    instance._author_stats_state = new_state
+
+
+@receiver(pre_delete, sender=Post)
+def count_likes_of_deleted_post(sender, instance, **kwargs):
+    # Polubienia znikną przed post_delete posta, więc liczymy je teraz.
+    instance._like_total = Like.objects.filter(post=instance).count()
+
+
+@receiver(post_delete, sender=Post)
+def update_author_stats_on_delete(sender, instance, **kwargs):
+    if _being_deleted('author', instance.author_id):
+        return
+    state = instance._author_stats_state
+    authors.change_author_stats(
+        instance.author_id,
+        post_count=-1 if state is not UNKNOWN and state[1] else 0,
+        like_count=-instance._like_total,
+        comment_count=-instance.comment_count,
+    )
+
+
+def _change_author_like_count(like, delta):
+    author_id = authors.post_author_id(like)
+    if author_id is not None:
+        authors.change_author_stats(author_id, like_count=delta)
+
+
+@receiver(post_save, sender=Like)
+def increment_author_like_count(sender, instance, created, **kwargs):
+    if created:
+        _change_author_like_count(instance, 1)
+
+
+@receiver(post_delete, sender=Like)
+def decrement_author_like_count(sender, instance, **kwargs):
+    if not _post_being_deleted(instance):
+        _change_author_like_count(instance, -1)
+
+
+@receiver(post_delete, sender=Like)
+def queue_trending_recount_on_unlike(sender, instance, **kwargs):
+    # Wynik jest sumą narastającą - cofniętego polubienia nie da się odjąć.
+    if not _post_being_deleted(instance):
+        trending.queue_recount([instance.post_id])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def touch_saved_post(sender, instance, **kwargs):
+    touch_post(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def touch_saved_user(sender, instance, **kwargs):
+    touch_object(f'user:{instance.pk}')
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    instance._old_username = instance.__dict__.get('username', UNKNOWN)
+
+
+@receiver(post_save, sender=User)
+def touch_renamed_author(sender, instance, created, **kwargs):
+    # API zwraca nazwę autora posta i komentarza - po zmianie nazwy ETagi
+    # jego postów i list komentarzy, pod którymi pisał, muszą się zmienić.
+    old_username = instance._old_username
+    instance._old_username = instance.username
+    if created or old_username is UNKNOWN or old_username == instance.username:
+        return
+    for post_id in Post.objects.filter(author=instance).values_list('pk', flat=True):
+        touch_post(post_id)
+    commented = Comment.objects.filter(author=instance).order_by().values_list('post_id', flat=True).distinct()
+    for post_id in commented:
+        touch_object(f'comments:{post_id}')
+
+
+@receiver(post_save, sender=Post)
+def reschedule_publishing(sender, instance, **kwargs):
+    if instance.published_date and instance.published_date > timezone.now():
+        transaction.on_commit(scheduling.reschedule)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def touch_commented_or_liked_post(sender, instance, **kwargs):
+    if _post_being_deleted(instance):
+        return
+    touch_post(instance.post_id)
+    if sender is Comment:
+        bump_version(f'comments:{instance.post_id}')
+    transaction.on_commit(lambda: events.publish_counts(instance.post_id))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def touch_tagged_post(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    bump_version('posts')
+    post_ids = (pk_set or ()) if reverse else [instance.pk]
+    for post_id in post_ids:
+        touch_post(post_id)
+
+
+def invalidate_post_snapshots(post_id):
+    if snapshots.enabled():
+        paths = snapshots.post_paths(post_id)
+        transaction.on_commit(lambda: snapshots.invalidate(paths))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def invalidate_snapshots(sender, instance, **kwargs):
+    if sender is Post:
+        invalidate_post_snapshots(instance.pk)
+    elif not _post_being_deleted(instance):
+        invalidate_post_snapshots(instance.post_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(pre_delete, sender=Post)
+def invalidate_referring_snapshots(sender, instance, **kwargs):
+    # Listy powiązanych postów na innych stronach pokazują tytuł i datę tego
+    # posta. Przy usuwaniu wiersze RelatedPost znikają przed post_delete.
+    if snapshots.enabled():
+        referring = RelatedPost.objects.filter(related=instance.pk).values_list('post_id', flat=True)
+        paths = snapshots.detail_paths(sorted(set(referring)))
+        if paths:
+            transaction.on_commit(lambda: snapshots.invalidate(paths))
+
+
+@receiver(pre_save, sender=Comment)
+def remember_approval_before_save(sender, instance, **kwargs):
+    # update_comment_count_on_save nadpisuje _was_approved już w post_save.
+    instance._approved_before_save = instance._was_approved
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_snapshots_for_comment(sender, instance, signal, **kwargs):
+    # Niezatwierdzone komentarze nie są widoczne na stronie.
+    was_approved = instance._approved_before_save if signal is post_save else instance._was_approved
+    if (instance.approved_comment or was_approved is not False) and not _post_being_deleted(instance):
+        invalidate_post_snapshots(instance.post_id)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_snapshots_for_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action.startswith('post_'):
+        for post_id in (pk_set or ()) if reverse else [instance.pk]:
+            invalidate_post_snapshots(post_id)
+
+
+# Na końcu modułu - po wszystkich pozostałych odbiorcach post_delete.
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=User)
+def forget_deleted_object(sender, instance, **kwargs):
+    kind = 'post' if sender is Post else 'author'
+    _deleting.set(_deleting.get() - {(kind, instance.pk)})
@@ -0,0 +1,61 @@
+import hashlib
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+
+TOKEN_RE = re.compile(r'\w{3,}')
+TITLE_WEIGHT = 2
+
+
+def tokenize(title, content):
+    tokens = Counter(TOKEN_RE.findall(content.lower()))
+    for token in TOKEN_RE.findall(title.lower()):
+        tokens[token] += TITLE_WEIGHT
+    return tokens
+
+
+def content_hash(title, content):
+    return hashlib.sha1(f'{title}\0{content}'.encode('utf-8')).hexdigest()
+
+
+class TfidfIndex:
+    """
+    Rzadkie wektory TF-IDF (słowniki token -> waga, znormalizowane L2) wraz
+    z indeksem odwróconym, dzięki któremu podobieństwo liczymy tylko dla
+    postów mających wspólne słowa.
+    """
+
+    def __init__(self, documents):
+        document_frequency = Counter()
+        for tokens in documents.values():
+            document_frequency.update(tokens.keys())
+
+        total = len(documents)
+        idf = {
+            token: math.log((1 + total) / (1 + count)) + 1
+            for token, count in document_frequency.items()
+        }
+
+        self.vectors = {}
+        self.postings = defaultdict(list)
+        for pk, tokens in documents.items():
+            vector = {token: (1 + math.log(count)) * idf[token] for token, count in tokens.items()}
+            norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+            vector = {token: weight / norm for token, weight in vector.items()}
+            self.vectors[pk] = vector
+            for token, weight in vector.items():
+                self.postings[token].append((pk, weight))
+
+    def similarities(self, pk):
+        scores = defaultdict(float)
+        for token, weight in self.vectors.get(pk, {}).items():
+            for other_pk, other_weight in self.postings[token]:
+                if other_pk != pk:
+                    scores[other_pk] += weight * other_weight
+        return scores
+
+
+def top_k(scores, k):
+    return heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
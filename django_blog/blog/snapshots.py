@@ -0,0 +1,106 @@
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpRequest
+from django.urls import Resolver404, resolve, reverse
+from django.utils import timezone
+
+
+def enabled():
+    return settings.STATIC_SNAPSHOTS_ENABLED
+
+
+def snapshot_file(path):
+    root = Path(settings.STATIC_SNAPSHOT_ROOT).resolve()
+    target = (root / path.strip('/') / 'index.html').resolve()
+    if root not in target.parents:
+        raise ValueError(f'Ścieżka poza katalogiem snapshotów: {path}')
+    return target
+
+
+def post_paths(post_id):
+    """Pliki, które zmiana posta (albo jego komentarzy i polubień) unieważnia."""
+    return [reverse('post_list'), reverse('post_detail', args=[post_id])]
+
+
+def detail_paths(post_ids):
+    """Strony wskazanych postów, np. po zmianie ich list powiązanych postów."""
+    return [reverse('post_detail', args=[post_id]) for post_id in post_ids]
+
+
+def invalidate(paths):
+    """
+    Usuwa nieaktualne pliki od razu - do czasu ich odbudowania nginx
+    przekazuje żądania do Django - i kolejkuje je do build_snapshots.
+    """
+    from .models import StaleSnapshot
+
+    for path in paths:
+        try:
+            snapshot_file(path).unlink()
+        except FileNotFoundError:
+            pass
+    StaleSnapshot.objects.bulk_create([StaleSnapshot(path=path) for path in paths], ignore_conflicts=True)
+
+
+def _anonymous_request(path):
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = path
+    request.META = {
+        'SERVER_NAME': settings.ALLOWED_HOSTS[0],
+        'SERVER_PORT': '443',
+        'HTTP_HOST': settings.ALLOWED_HOSTS[0],
+        'HTTP_X_FORWARDED_PROTO': 'https',
+    }
+    request.user = AnonymousUser()
+    return request
+
+
+def publishable(path):
+    """Kopie statyczne powstają tylko dla opublikowanych postów."""
+    from .models import Post
+
+    match = resolve(path)
+    if match.url_name == 'post_detail':
+        return Post.objects.filter(pk=match.kwargs['pk'], published_date__lte=timezone.now()).exists()
+    return True
+
+
+def render_snapshot(path):
+    """Zwraca HTML strony widzianej przez anonimowego czytelnika albo None (404)."""
+    try:
+        if not publishable(path):
+            return None
+        match = resolve(path)
+        response = match.func(_anonymous_request(path), *match.args, **match.kwargs)
+    except (Resolver404, Http404):
+        return None
+    if hasattr(response, 'render'):
+        response.render()
+    if response.status_code != 200:
+        return None
+    return response.content
+
+
+def write_snapshot(path):
+    """Renderuje i atomowo zapisuje plik; dla nieistniejących stron usuwa plik."""
+    target = snapshot_file(path)
+    content = render_snapshot(path)
+    if content is None:
+        try:
+            target.unlink()
+        except FileNotFoundError:
+            pass
+        return False
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix='.index-')
+    with os.fdopen(fd, 'wb') as tmp_file:
+        tmp_file.write(content)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, target)
+    return True
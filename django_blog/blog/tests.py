@@ -1,22 +1,42 @@
-from django.test import TestCase, Client
+from django.test import TestCase, SimpleTestCase, TransactionTestCase, Client, override_settings
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.urls import reverse
-from django.db import IntegrityError
-from datetime import timedelta
+from django.db import IntegrityError, connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from django.core.cache import cache
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+import asyncio
 import json
-
-from .models import Post, Comment, Like, Newsletter
+import math
+import os
+import runpy
+import tempfile
+import time
+
+from .models import (
+    Post, Comment, Like, Newsletter, Tag, RelatedPost, PostFingerprint, PostArchiveMonth, JobCheckpoint,
+    StaleSnapshot, AuthorStats, TrendingRecount
+)
 from .forms import PostForm, CommentForm, NewsletterForm
+from . import events, pagination, profiling, routers, scheduling, trending
+from .moderation import moderate_comments
+from .cache import get_object, get_objects, get_version
 
 
 class PostModelTest(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(username='testuser', password='testpass123')
-        self.post = Post.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        cls.post = Post.objects.create(
             title='Test Post',
             content='Test content',
-            author=self.user
+            author=cls.user
         )
 
     def test_post_creation(self):
@@ -45,16 +65,17 @@ class PostModelTest(TestCase):
 
 
 class CommentModelTest(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(username='testuser', password='testpass123')
-        self.post = Post.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        cls.post = Post.objects.create(
             title='Test Post',
             content='Test content',
-            author=self.user
+            author=cls.user
         )
-        self.comment = Comment.objects.create(
-            post=self.post,
-            author=self.user,
+        cls.comment = Comment.objects.create(
+            post=cls.post,
+            author=cls.user,
             text='Test comment'
         )
 
@@ -84,13 +105,14 @@ class CommentModelTest(TestCase):
 
 
 class LikeModelTest(TestCase):
-    def setUp(self):
-        self.user1 = User.objects.create_user(username='user1', password='testpass123')
-        self.user2 = User.objects.create_user(username='user2', password='testpass123')
-        self.post = Post.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(username='user1', password='testpass123')
+        cls.user2 = User.objects.create_user(username='user2', password='testpass123')
+        cls.post = Post.objects.create(
             title='Test Post',
             content='Test content',
-            author=self.user1
+            author=cls.user1
         )
 
     def test_like_creation(self):
@@ -169,7 +191,16 @@ class PostFormTest(TestCase):
 
     def test_post_form_fields(self):
         form = PostForm()
-        self.assertEqual(list(form.fields.keys()), ['title', 'content'])
+        self.assertEqual(list(form.fields.keys()), ['title', 'content', 'published_date', 'tags'])
+
+    def test_post_form_tags_are_deduplicated(self):
+        form = PostForm(data={
+            'title': 'Test Title',
+            'content': 'Test content',
+            'tags': 'Django, python, Python, , '
+        })
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['tags'], {'django': 'Django', 'python': 'python'})
 
 
 class CommentFormTest(TestCase):
@@ -212,27 +243,27 @@ class NewsletterFormTest(TestCase):
 
 
 class PostListViewTest(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.user = User.objects.create_user(username='testuser', password='testpass123')
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
 
-        self.published_post = Post.objects.create(
+        cls.published_post = Post.objects.create(
             title='Published Post',
             content='Published content',
-            author=self.user,
+            author=cls.user,
             published_date=timezone.now() - timedelta(days=1)
         )
 
-        self.unpublished_post = Post.objects.create(
+        cls.unpublished_post = Post.objects.create(
             title='Unpublished Post',
             content='Unpublished content',
-            author=self.user
+            author=cls.user
         )
 
-        self.future_post = Post.objects.create(
+        cls.future_post = Post.objects.create(
             title='Future Post',
             content='Future content',
-            author=self.user,
+            author=cls.user,
             published_date=timezone.now() + timedelta(days=1)
         )
 
@@ -265,13 +296,13 @@ class PostListViewTest(TestCase):
 
 
 class PostDetailViewTest(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.user = User.objects.create_user(username='testuser', password='testpass123')
-        self.post = Post.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        cls.post = Post.objects.create(
             title='Test Post',
             content='Test content',
-            author=self.user,
+            author=cls.user,
             published_date=timezone.now()
         )
 
@@ -312,9 +343,9 @@ class PostDetailViewTest(TestCase):
 
 
 class PostNewViewTest(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.user = User.objects.create_user(username='testuser', password='testpass123')
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
 
     def test_post_new_view_login_required(self):
         response = self.client.get(reverse('post_new'))
@@ -350,13 +381,13 @@ class PostNewViewTest(TestCase):
 
 
 class PostEditViewTest(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.user = User.objects.create_user(username='testuser', password='testpass123')
-        self.post = Post.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        cls.post = Post.objects.create(
             title='Original Title',
             content='Original content',
-            author=self.user
+            author=cls.user
         )
 
     def test_post_edit_view_login_required(self):
@@ -389,13 +420,13 @@ class PostEditViewTest(TestCase):
 
 
 class LikePostViewTest(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.user = User.objects.create_user(username='testuser', password='testpass123')
-        self.post = Post.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        cls.post = Post.objects.create(
             title='Test Post',
             content='Test content',
-            author=self.user,
+            author=cls.user,
             published_date=timezone.now()
         )
 
@@ -444,9 +475,6 @@ class LikePostViewTest(TestCase):
 
 
 class NewsletterSignupViewTest(TestCase):
-    def setUp(self):
-        self.client = Client()
-
     def test_newsletter_signup_view_success(self):
         response = self.client.post(
             reverse('newsletter_signup'),
@@ -475,7 +503,1599 @@ class NewsletterSignupViewTest(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(Newsletter.objects.count(), 0)
 
+    def test_newsletter_signup_normalizes_email(self):
+        Newsletter.objects.create(email='test@example.com')
+        response = self.client.post(
+            reverse('newsletter_signup'),
+            {'email': ' Test@Example.COM '},
+            follow=True
+        )
+        self.assertContains(response, 'Ten adres email jest już zapisany do newslettera.')
+        self.assertEqual(Newsletter.objects.count(), 1)
+
     def test_newsletter_signup_get_request(self):
         response = self.client.get(reverse('newsletter_signup'))
         self.assertEqual(response.status_code, 302)
         self.assertRedirects(response, reverse('post_list'))
+
+
+@override_settings(REPLICA_WEIGHTS={'replica1': 1})
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = routers.PrimaryReplicaRouter()
+        self.tokens = routers.start_request()
+
+    def tearDown(self):
+        routers.end_request(self.tokens)
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(self.router.db_for_read(Post), 'replica1')
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_reads_stick_to_primary_after_write(self):
+        self.router.db_for_write(Post)
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_pinned_request_reads_from_primary(self):
+        routers.end_request(self.tokens)
+        self.tokens = routers.start_request(pinned=True)
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_replica_weights(self):
+        with override_settings(REPLICA_WEIGHTS={'replica1': 1, 'replica2': 0}):
+            for _ in range(20):
+                self.assertEqual(self.router.db_for_read(Post), 'replica1')
+
+    def test_no_replicas_configured(self):
+        with override_settings(REPLICA_WEIGHTS={}):
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_migrations_only_on_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'blog'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'blog'))
+
+
+# Replika jest lustrem bazy głównej (test_settings.py). Zwykły TestCase trzyma
+# dane w niezatwierdzonej transakcji, której drugie połączenie nie widzi.
+@override_settings(REPLICA_WEIGHTS={'replica': 1})
+class PrimaryPinMiddlewareTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.post = Post.objects.create(
+            title='Test Post',
+            content='Test content',
+            author=self.user,
+            published_date=timezone.now()
+        )
+
+    def test_write_sets_pin_cookie(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('post_detail', args=[self.post.pk]),
+            {'text': 'Test comment'}
+        )
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_read_does_not_set_pin_cookie(self):
+        response = self.client.get(reverse('post_list'))
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def queries_by_alias(self, request):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = request()
+        return response, [q['sql'] for q in primary.captured_queries], [q['sql'] for q in replica.captured_queries]
+
+    def test_reads_go_to_replica(self):
+        response, primary, replica = self.queries_by_alias(
+            lambda: self.client.get(reverse('api_post_detail', args=[self.post.pk])))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(primary, [])
+        self.assertTrue(any('"blog_post"' in sql for sql in replica))
+
+    def test_writes_go_to_primary(self):
+        self.client.force_login(self.user)
+        response, primary, replica = self.queries_by_alias(lambda: self.client.post(
+            reverse('post_detail', args=[self.post.pk]), {'text': 'Test comment'}))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(any(sql.startswith('INSERT INTO "blog_comment"') for sql in primary))
+        self.assertFalse(any(sql.startswith(('INSERT', 'UPDATE', 'DELETE')) for sql in replica))
+
+    def test_pinned_request_reads_from_primary(self):
+        self.client.cookies[settings.REPLICA_PIN_COOKIE] = '1'
+        response, primary, replica = self.queries_by_alias(
+            lambda: self.client.get(reverse('api_post_detail', args=[self.post.pk])))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any('"blog_post"' in sql for sql in primary))
+        self.assertEqual(replica, [])
+
+
+class TagCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        now = timezone.now()
+        cls.post = Post.objects.create(title='Post', content='Content', author=cls.user, published_date=now)
+        cls.other_post = Post.objects.create(title='Other', content='Content', author=cls.user, published_date=now)
+        cls.draft = Post.objects.create(title='Draft', content='Content', author=cls.user)
+        cls.django = Tag.objects.create(name='Django', slug='django')
+        cls.python = Tag.objects.create(name='Python', slug='python')
+
+    def assertCounts(self, django, python):
+        self.django.refresh_from_db()
+        self.python.refresh_from_db()
+        self.assertEqual((self.django.post_count, self.python.post_count), (django, python))
+
+    def test_add_and_remove(self):
+        self.post.tags.add(self.django, self.python)
+        self.other_post.tags.add(self.django)
+        self.assertCounts(2, 1)
+        self.post.tags.remove(self.django)
+        self.assertCounts(1, 1)
+
+    def test_adding_existing_tag_does_not_double_count(self):
+        self.post.tags.add(self.django)
+        self.post.tags.add(self.django)
+        self.assertCounts(1, 0)
+
+    def test_removing_unlinked_tag_does_not_decrement(self):
+        self.post.tags.add(self.django)
+        self.post.tags.remove(self.django, self.python)
+        self.assertCounts(0, 0)
+
+    def test_set_and_clear(self):
+        self.post.tags.set([self.django])
+        self.post.tags.set([self.python])
+        self.assertCounts(0, 1)
+        self.post.tags.clear()
+        self.assertCounts(0, 0)
+
+    def test_reverse_relation(self):
+        self.django.posts.add(self.post, self.other_post)
+        self.assertCounts(2, 0)
+        self.django.posts.remove(self.post)
+        self.assertCounts(1, 0)
+        self.django.posts.clear()
+        self.assertCounts(0, 0)
+
+    def test_post_delete_decrements(self):
+        self.post.tags.add(self.django, self.python)
+        self.post.delete()
+        self.assertCounts(0, 0)
+
+    def test_drafts_are_not_counted(self):
+        self.draft.tags.add(self.django)
+        self.python.posts.add(self.draft, self.post)
+        self.assertCounts(0, 1)
+        self.assertEqual(list(Tag.popular()), [self.python])
+
+        self.draft.publish()
+        self.assertCounts(1, 2)
+        self.draft.published_date = None
+        self.draft.save()
+        self.assertCounts(0, 1)
+        self.draft.tags.clear()
+        self.draft.delete()
+        self.assertCounts(0, 1)
+
+    def test_scheduled_post_counted_when_it_goes_live(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            scheduled = Post.objects.create(
+                title='Later', content='Content', author=self.user,
+                published_date=timezone.now() + timedelta(hours=1))
+            scheduled.tags.add(self.django)
+        self.assertCounts(0, 0)
+        scheduling.publish_due(scheduled.published_date)
+        self.assertCounts(1, 0)
+
+    def test_drifted_count_does_not_go_negative(self):
+        self.post.tags.add(self.django)
+        Tag.objects.filter(pk=self.django.pk).update(post_count=0)
+        self.post.tags.remove(self.django)
+        self.assertCounts(0, 0)
+
+    def test_popular_tags(self):
+        Tag.objects.create(name='Unused', slug='unused')
+        self.post.tags.add(self.django, self.python)
+        self.other_post.tags.add(self.python)
+        self.assertEqual(list(Tag.popular()), [self.python, self.django])
+
+
+class TagViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        cls.tag = Tag.objects.create(name='Django', slug='django')
+        now = timezone.now()
+        cls.posts = []
+        for i in range(12):
+            post = Post.objects.create(
+                title=f'Post {i}',
+                content='Content',
+                author=cls.user,
+                published_date=now - timedelta(hours=i)
+            )
+            post.tags.add(cls.tag)
+            cls.posts.append(post)
+
+    def test_tag_detail_keyset_pagination(self):
+        response = self.client.get(reverse('tag_detail', args=['django']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['posts'], self.posts[:10])
+        next_cursor = response.context['next_cursor']
+        self.assertIsNotNone(next_cursor)
+
+        response = self.client.get(reverse('tag_detail', args=['django']), {'before': next_cursor})
+        self.assertEqual(response.context['posts'], self.posts[10:])
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_tag_detail_invalid_cursor_shows_first_page(self):
+        response = self.client.get(reverse('tag_detail', args=['django']), {'before': 'bogus'})
+        self.assertEqual(response.context['posts'], self.posts[:10])
+
+    def test_tag_detail_unknown_tag(self):
+        response = self.client.get(reverse('tag_detail', args=['unknown']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_post_list_shows_popular_tags(self):
+        response = self.client.get(reverse('post_list'))
+        self.assertEqual(list(response.context['popular_tags']), [self.tag])
+        self.assertContains(response, reverse('tag_detail', args=['django']))
+
+    def test_post_new_with_tags(self):
+        self.client.login(username='testuser', password='testpass123')
+        self.client.post(
+            reverse('post_new'),
+            {'title': 'New Post', 'content': 'New content', 'tags': 'Django, Docker'}
+        )
+        post = Post.objects.get(title='New Post')
+        self.assertEqual(sorted(tag.slug for tag in post.tags.all()), ['django', 'docker'])
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.post_count, 13)
+
+
+class RelatedPostsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        now = timezone.now()
+        cls.django = Post.objects.create(
+            title='Django views', content='Widoki Django i szablony Django',
+            author=cls.user, published_date=now)
+        cls.django2 = Post.objects.create(
+            title='Django models', content='Modele Django i migracje',
+            author=cls.user, published_date=now)
+        cls.docker = Post.objects.create(
+            title='Docker compose', content='Kontenery Docker w produkcji',
+            author=cls.user, published_date=now)
+
+    def related_ids(self, post):
+        return list(RelatedPost.objects.filter(post=post).values_list('related_id', flat=True))
+
+    def run_command(self, *args):
+        call_command('update_related_posts', '--top-k', '1', *args, stdout=StringIO())
+
+    def test_builds_related_lists(self):
+        self.run_command()
+        self.assertEqual(self.related_ids(self.django), [self.django2.pk])
+        self.assertEqual(self.related_ids(self.django2), [self.django.pk])
+        self.assertEqual(self.related_ids(self.docker), [])
+        self.assertEqual(PostFingerprint.objects.count(), 3)
+
+    def test_incremental_run_picks_up_new_post(self):
+        self.run_command()
+        docker2 = Post.objects.create(
+            title='Docker images', content='Obrazy Docker i kontenery',
+            author=self.user, published_date=timezone.now())
+        self.run_command()
+        self.assertEqual(self.related_ids(self.docker), [docker2.pk])
+        self.assertEqual(self.related_ids(docker2), [self.docker.pk])
+        self.assertEqual(self.related_ids(self.django), [self.django2.pk])
+
+    def test_incremental_run_handles_changed_and_deleted_posts(self):
+        self.run_command()
+        self.django2.title = 'Docker volumes'
+        self.django2.content = 'Wolumeny Docker w kontenerach'
+        self.django2.save()
+        self.run_command()
+        self.assertEqual(self.related_ids(self.docker), [self.django2.pk])
+        self.assertEqual(self.related_ids(self.django), [])
+
+        self.django2.delete()
+        self.run_command()
+        self.assertEqual(self.related_ids(self.docker), [])
+        self.assertFalse(PostFingerprint.objects.filter(post_id=self.django2.pk).exists())
+
+    def test_unchanged_run_touches_nothing(self):
+        self.run_command()
+        out = StringIO()
+        call_command('update_related_posts', stdout=out)
+        self.assertIn('zaktualizowane listy: 0', out.getvalue())
+
+    def test_post_detail_shows_related_posts(self):
+        self.run_command()
+        response = self.client.get(reverse('post_detail', args=[self.django.pk]))
+        self.assertEqual(response.context['related_posts'], [self.django2])
+        self.assertContains(response, 'Powiązane posty')
+
+
+class PostArchiveTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        cls.march = timezone.make_aware(datetime(2025, 3, 15, 12, 0))
+        cls.april = timezone.make_aware(datetime(2025, 4, 2, 12, 0))
+
+    def counts(self):
+        return {
+            (month.year, month.month): month.post_count
+            for month in PostArchiveMonth.objects.filter(post_count__gt=0)
+        }
+
+    def create_post(self, published_date):
+        return Post.objects.create(
+            title='Post', content='Content', author=self.user, published_date=published_date)
+
+    def test_counts_follow_publish_edit_and_delete(self):
+        post = self.create_post(self.march)
+        self.create_post(self.march)
+        draft = self.create_post(None)
+        self.assertEqual(self.counts(), {(2025, 3): 2})
+
+        post = Post.objects.get(pk=post.pk)
+        post.published_date = self.april
+        post.save()
+        self.assertEqual(self.counts(), {(2025, 3): 1, (2025, 4): 1})
+
+        draft.published_date = self.april
+        draft.save()
+        self.assertEqual(self.counts(), {(2025, 3): 1, (2025, 4): 2})
+
+        post.delete()
+        self.assertEqual(self.counts(), {(2025, 3): 1, (2025, 4): 1})
+
+    def test_publish_method(self):
+        post = self.create_post(None)
+        post.publish()
+        now = timezone.localtime()
+        self.assertEqual(self.counts(), {(now.year, now.month): 1})
+
+    def test_rebuild_command(self):
+        self.create_post(self.march)
+        self.create_post(self.april)
+        PostArchiveMonth.objects.all().delete()
+        PostArchiveMonth.objects.create(year=2020, month=1, post_count=7)
+
+        call_command('rebuild_post_archive', stdout=StringIO())
+        self.assertEqual(self.counts(), {(2025, 3): 1, (2025, 4): 1})
+
+    def test_archive_view(self):
+        march_post = self.create_post(self.march)
+        self.create_post(self.april)
+        response = self.client.get(reverse('post_archive', args=[2025, 3]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['posts'], [march_post])
+        self.assertEqual(len(response.context['archive_months']), 2)
+
+    def test_archive_view_december(self):
+        post = self.create_post(timezone.make_aware(datetime(2024, 12, 31, 23, 0)))
+        response = self.client.get(reverse('post_archive', args=[2024, 12]))
+        self.assertEqual(response.context['posts'], [post])
+
+    def test_archive_view_invalid_month(self):
+        response = self.client.get(reverse('post_archive', args=[2025, 13]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_sidebar_hides_future_months(self):
+        self.create_post(timezone.now() + timedelta(days=400))
+        response = self.client.get(reverse('post_list'))
+        self.assertEqual(len(response.context['archive_months']), 0)
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        now = timezone.now()
+        cls.posts = [
+            Post.objects.create(
+                title=f'Post {i}', content='Content', author=cls.user,
+                published_date=now - timedelta(hours=i))
+            for i in range(3)
+        ]
+        Post.objects.create(title='Draft', content='Content', author=cls.user)
+        Like.objects.create(post=cls.posts[0], user=cls.user)
+        Comment.objects.create(post=cls.posts[0], author=cls.user, text='First', approved_comment=True)
+        Comment.objects.create(post=cls.posts[0], author=cls.user, text='Second', approved_comment=True)
+        Comment.objects.create(post=cls.posts[0], author=cls.user, text='Pending')
+
+    def test_post_list(self):
+        response = self.client.get(reverse('api_post_list'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([post['id'] for post in data['results']], [post.pk for post in self.posts])
+        first = data['results'][0]
+        self.assertEqual(first['author'], 'testuser')
+        self.assertEqual(first['likes_count'], 1)
+        self.assertEqual(first['comments_count'], 2)
+        self.assertIsNone(data['next'])
+
+    def test_post_list_cursor_pagination(self):
+        data = self.client.get(reverse('api_post_list'), {'limit': 2, 'fields': 'id'}).json()
+        self.assertEqual(data['results'], [{'id': self.posts[0].pk}, {'id': self.posts[1].pk}])
+        data = self.client.get(data['next']).json()
+        self.assertEqual(data['results'], [{'id': self.posts[2].pk}])
+        self.assertIsNone(data['next'])
+
+    def test_sparse_fields_skip_unused_columns(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api_post_list'), {'fields': 'id,title'})
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'title'})
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse('api_post_list'), {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_post_detail(self):
+        data = self.client.get(reverse('api_post_detail', args=[self.posts[0].pk])).json()
+        self.assertEqual(data['title'], 'Post 0')
+        self.assertEqual(data['likes_count'], 1)
+
+    def test_post_detail_hides_drafts(self):
+        draft = Post.objects.get(title='Draft')
+        response = self.client.get(reverse('api_post_detail', args=[draft.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_comment_list(self):
+        data = self.client.get(
+            reverse('api_comment_list', args=[self.posts[0].pk]), {'fields': 'text,author'}).json()
+        self.assertEqual(data['results'], [
+            {'text': 'Second', 'author': 'testuser'},
+            {'text': 'First', 'author': 'testuser'},
+        ])
+
+    def test_etag_not_modified(self):
+        url = reverse('api_post_list')
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Like.objects.create(post=self.posts[1], user=User.objects.create_user(username='other'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_comment_etag_changes_on_new_comment(self):
+        url = reverse('api_comment_list', args=[self.posts[0].pk])
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(post=self.posts[0], author=self.user, text='Third')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etags_change_when_author_is_renamed(self):
+        urls = [
+            reverse('api_post_list'),
+            reverse('api_post_detail', args=[self.posts[0].pk]),
+            reverse('api_comment_list', args=[self.posts[0].pk]),
+        ]
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+
+        user = User.objects.get(pk=self.user.pk)
+        user.last_login = timezone.now()
+        user.save(update_fields=['last_login'])
+        for url in urls:
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etags[url]).status_code, 304)
+
+        user.username = 'renamed'
+        user.save()
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('renamed', response.content.decode())
+
+
+class LiveEventsTest(SimpleTestCase):
+    def setUp(self):
+        self.hub = events.EventHub()
+
+    async def test_hub_delivers_latest_counts(self):
+        queue = self.hub.subscribe(1)
+        self.assertTrue(self.hub.has_subscribers(1))
+        self.hub.publish(1, {'likes_count': 1})
+        self.hub.publish(1, {'likes_count': 2})
+        await asyncio.sleep(0)
+        self.assertEqual(queue.get_nowait(), {'likes_count': 2})
+
+        self.hub.unsubscribe(1, queue)
+        self.assertFalse(self.hub.has_subscribers(1))
+
+    async def test_hub_publish_from_other_thread(self):
+        queue = self.hub.subscribe(1)
+        await asyncio.get_running_loop().run_in_executor(None, self.hub.publish, 1, {'likes_count': 3})
+        self.assertEqual(await asyncio.wait_for(queue.get(), 1), {'likes_count': 3})
+
+    async def test_sse_stream(self):
+        async def django_app(scope, receive, send):
+            raise AssertionError('SSE request reached Django')
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/post/7/events/'}
+        with mock.patch.object(events, 'hub', self.hub), \
+                mock.patch.object(events, 'post_is_published', return_value=True):
+            communicator = ApplicationCommunicator(events.LiveEventsRouter(django_app), scope)
+            start = await communicator.receive_output(1)
+            self.assertEqual(start['status'], 200)
+            self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+            self.assertEqual((await communicator.receive_output(1))['body'], b'retry: 5000\n\n')
+
+            self.hub.publish(7, {'post': 7, 'likes_count': 1, 'comments_count': 0})
+            body = (await communicator.receive_output(1))['body']
+            self.assertTrue(body.startswith(b'event: counts\ndata: {"post": 7'))
+
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(1)
+            self.assertFalse(self.hub.has_subscribers(7))
+
+    async def test_unpublished_post_has_no_stream(self):
+        async def django_app(scope, receive, send):
+            raise AssertionError('SSE request reached Django')
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/post/7/events/'}
+        with mock.patch.object(events, 'hub', self.hub), \
+                mock.patch.object(events, 'post_is_published', return_value=False):
+            communicator = ApplicationCommunicator(events.LiveEventsRouter(django_app), scope)
+            self.assertEqual((await communicator.receive_output(1))['status'], 404)
+            await communicator.wait(1)
+        self.assertFalse(self.hub.has_subscribers(7))
+
+    async def test_other_requests_reach_django(self):
+        called = []
+
+        async def django_app(scope, receive, send):
+            called.append(scope['path'])
+
+        router = events.LiveEventsRouter(django_app)
+        await router({'type': 'http', 'method': 'GET', 'path': '/post/7/'}, None, None)
+        self.assertEqual(called, ['/post/7/'])
+
+
+class LiveEventsSignalTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        cls.post = Post.objects.create(title='Post', content='Content', author=cls.user)
+
+    def test_like_publishes_counts_to_subscribers(self):
+        with mock.patch.object(events.hub, 'has_subscribers', return_value=True), \
+                mock.patch.object(events.hub, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                Like.objects.create(post=self.post, user=self.user)
+            with self.captureOnCommitCallbacks(execute=True):
+                Comment.objects.create(post=self.post, author=self.user, text='Comment', approved_comment=True)
+
+        publish.assert_called_with(self.post.pk, {
+            'post': self.post.pk, 'likes_count': 1, 'comments_count': 1
+        })
+
+    def test_post_is_published(self):
+        self.assertFalse(events.post_is_published(self.post.pk))
+        Post.objects.filter(pk=self.post.pk).update(published_date=timezone.now() + timedelta(hours=1))
+        self.assertFalse(events.post_is_published(self.post.pk))
+        Post.objects.filter(pk=self.post.pk).update(published_date=timezone.now())
+        self.assertTrue(events.post_is_published(self.post.pk))
+
+    def test_postgres_notify_sends_only_post_id(self):
+        cursor = mock.MagicMock()
+        with override_settings(LIVE_EVENTS_BACKEND='postgres'), \
+                mock.patch.object(events.connection, 'cursor', return_value=cursor):
+            with self.assertNumQueries(0):
+                events.publish_counts(self.post.pk)
+        cursor.__enter__.return_value.execute.assert_called_once_with(
+            'SELECT pg_notify(%s, %s)', [events.NOTIFY_CHANNEL, str(self.post.pk)])
+
+    def test_no_queries_without_subscribers(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Like.objects.create(post=self.post, user=self.user)
+        with self.assertNumQueries(0):
+            for callback in callbacks:
+                callback()
+
+
+class AdminChangelistTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', password='adminpass123')
+        cls.post = Post.objects.create(title='Post', content='Content', author=cls.admin)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def create_rows(self, count):
+        for i in range(count):
+            user = User.objects.create_user(username=f'user{Like.objects.count()}')
+            Comment.objects.create(post=self.post, author=user, text=f'Comment {i}')
+            Like.objects.create(post=self.post, user=user)
+
+    def changelist_queries(self, url_name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        for url_name in ('admin:blog_comment_changelist', 'admin:blog_like_changelist'):
+            self.create_rows(2)
+            few = self.changelist_queries(url_name)
+            self.create_rows(5)
+            self.assertEqual(self.changelist_queries(url_name), few)
+
+    def test_comment_search(self):
+        self.create_rows(1)
+        Comment.objects.create(post=self.post, author=self.admin, text='Szukany tekst')
+        response = self.client.get(reverse('admin:blog_comment_changelist'), {'q': 'szukany'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        response = self.client.get(reverse('admin:blog_comment_changelist'), {'q': 'admin'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=100)
+    def test_estimated_count_for_large_unfiltered_lists(self):
+        with mock.patch.object(pagination, 'estimated_count', return_value=50000):
+            paginator = pagination.EstimatedCountPaginator(Post.objects.order_by('pk'), 10)
+            self.assertEqual(paginator.count, 50000)
+
+            paginator = pagination.EstimatedCountPaginator(Post.objects.filter(title='Post').order_by('pk'), 10)
+            self.assertEqual(paginator.count, 1)
+
+        with mock.patch.object(pagination, 'estimated_count', return_value=50):
+            paginator = pagination.EstimatedCountPaginator(Post.objects.order_by('pk'), 10)
+            self.assertEqual(paginator.count, 1)
+
+    def test_estimated_count_unavailable_on_sqlite(self):
+        if connection.vendor != 'postgresql':
+            self.assertIsNone(pagination.estimated_count(Post.objects.all()))
+
+
+class CommentModerationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='staff', password='staffpass123', is_staff=True)
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        cls.post = Post.objects.create(
+            title='Post', content='Content', author=cls.user, published_date=timezone.now())
+        cls.other_post = Post.objects.create(
+            title='Other', content='Content', author=cls.user, published_date=timezone.now())
+        cls.comments = [
+            Comment.objects.create(post=post, author=cls.user, text=f'Comment {i}')
+            for i, post in enumerate([cls.post, cls.post, cls.other_post])
+        ]
+
+    def comment_counts(self):
+        return list(Post.objects.order_by('pk').values_list('comment_count', flat=True))
+
+    def test_comment_count_follows_single_approval_and_delete(self):
+        self.comments[0].approve()
+        self.assertEqual(self.comment_counts(), [1, 0])
+        self.comments[0].delete()
+        self.comments[1].delete()
+        self.assertEqual(self.comment_counts(), [0, 0])
+
+    def test_bulk_approve_and_reject(self):
+        ids = [comment.pk for comment in self.comments]
+        with self.assertNumQueries(6):
+            self.assertEqual(moderate_comments(ids, approve=True), 3)
+        self.assertEqual(self.comment_counts(), [2, 1])
+
+        moderate_comments(ids[:1], approve=False)
+        self.assertEqual(self.comment_counts(), [1, 1])
+        self.assertTrue(Comment.objects.get(pk=ids[0]).rejected_comment)
+
+    def test_post_detail_shows_only_approved_comments(self):
+        self.comments[0].approve()
+        response = self.client.get(reverse('post_detail', args=[self.post.pk]))
+        self.assertEqual(list(response.context['comments']), [self.comments[0]])
+        self.assertNotContains(response, 'Comment 1')
+
+    def test_queue_requires_staff(self):
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('moderation_queue'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_queue_lists_pending_comments(self):
+        self.comments[0].approve()
+        self.client.login(username='staff', password='staffpass123')
+        response = self.client.get(reverse('moderation_queue'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['comments'], [self.comments[2], self.comments[1]])
+
+        data = self.client.get(reverse('moderation_queue'), {'format': 'json'}).json()
+        self.assertEqual([comment['id'] for comment in data['results']], [self.comments[2].pk, self.comments[1].pk])
+        self.assertIsNone(data['next_cursor'])
+
+    def test_moderate_view(self):
+        self.client.login(username='staff', password='staffpass123')
+        response = self.client.post(reverse('moderate_comments'), {
+            'action': 'approve',
+            'ids': [self.comments[0].pk, self.comments[1].pk]
+        })
+        self.assertEqual(response.json(), {'updated': 2})
+        self.assertEqual(self.comment_counts(), [2, 0])
+
+        response = self.client.post(reverse('moderate_comments'), {'action': 'delete', 'ids': [1]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_actions(self):
+        admin = User.objects.create_superuser(username='admin', password='adminpass123')
+        self.client.force_login(admin)
+        self.client.post(reverse('admin:blog_comment_changelist'), {
+            'action': 'approve_comments',
+            '_selected_action': [comment.pk for comment in self.comments],
+        })
+        self.assertEqual(self.comment_counts(), [2, 1])
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(username=f'user{i}') for i in range(3)]
+        now = timezone.now()
+        cls.hot = Post.objects.create(title='Hot', content='C', author=cls.users[0], published_date=now)
+        cls.warm = Post.objects.create(title='Warm', content='C', author=cls.users[0], published_date=now)
+        cls.quiet = Post.objects.create(title='Quiet', content='C', author=cls.users[0], published_date=now)
+
+    def run_command(self, at=None):
+        # Domyślnie tak, jakby od dodania zdarzeń w teście minęło SETTLE_SECONDS.
+        at = at or timezone.now() + timedelta(seconds=trending.SETTLE_SECONDS)
+        with mock.patch('django.utils.timezone.now', return_value=at):
+            call_command('update_trending', stdout=StringIO())
+
+    def test_scores_combine_in_log_space(self):
+        now = timezone.now()
+        single = trending.event_score(1.0, now)
+        self.assertAlmostEqual(trending.add_scores(single, single), trending.event_score(2.0, now))
+        later = trending.event_score(1.0, now + timedelta(seconds=trending.HALF_LIFE_SECONDS))
+        self.assertAlmostEqual(later - single, math.log(2))
+        self.assertIsNone(trending.add_scores(None))
+
+    def test_ranking_by_recent_activity(self):
+        for user in self.users:
+            Like.objects.create(post=self.hot, user=user)
+        Like.objects.create(post=self.warm, user=self.users[0])
+        self.run_command()
+
+        response = self.client.get(reverse('trending'))
+        self.assertEqual(list(response.context['posts']), [self.hot, self.warm])
+        self.assertEqual(list(response.context['trending_posts']), [self.hot, self.warm])
+
+    def test_old_activity_decays(self):
+        Like.objects.create(post=self.hot, user=self.users[0],
+                            created_date=timezone.now() - timedelta(days=6))
+        Like.objects.create(post=self.warm, user=self.users[0])
+        self.run_command()
+        response = self.client.get(reverse('trending'))
+        self.assertEqual(list(response.context['posts']), [self.warm])
+
+    def test_incremental_run_only_touches_active_posts(self):
+        Like.objects.create(post=self.hot, user=self.users[0])
+        self.run_command()
+        self.hot.refresh_from_db()
+        first_score = self.hot.trending_score
+        self.assertTrue(JobCheckpoint.objects.filter(name='update_trending').exists())
+
+        Like.objects.create(post=self.warm, user=self.users[0])
+        self.run_command()
+        self.hot.refresh_from_db()
+        self.warm.refresh_from_db()
+        self.assertEqual(self.hot.trending_score, first_score)
+        self.assertIsNotNone(self.warm.trending_score)
+        self.quiet.refresh_from_db()
+        self.assertIsNone(self.quiet.trending_score)
+
+    def test_comments_count_once_approved(self):
+        Comment.objects.create(post=self.quiet, author=self.users[0], text='Pending')
+        Comment.objects.create(post=self.warm, author=self.users[0], text='Ok', approved_comment=True)
+        self.run_command()
+        self.quiet.refresh_from_db()
+        self.warm.refresh_from_db()
+        self.assertIsNone(self.quiet.trending_score)
+        self.assertAlmostEqual(
+            self.warm.trending_score,
+            trending.event_score(trending.COMMENT_WEIGHT, Comment.objects.get(text='Ok').approved_date)
+        )
+
+    def test_recent_event_waits_for_commit_window(self):
+        like = Like.objects.create(post=self.hot, user=self.users[0])
+        self.run_command(at=like.created_date + timedelta(seconds=1))
+        self.hot.refresh_from_db()
+        self.assertIsNone(self.hot.trending_score)
+
+        self.run_command()
+        self.hot.refresh_from_db()
+        self.assertAlmostEqual(self.hot.trending_score, trending.event_score(trending.LIKE_WEIGHT, like.created_date))
+
+    def test_comment_scored_when_approved_after_a_run(self):
+        comment = Comment.objects.create(post=self.quiet, author=self.users[0], text='Late',
+                                         created_date=timezone.now() - timedelta(hours=1))
+        self.run_command()
+        moderate_comments([comment.pk], approve=True)
+        self.run_command()
+        self.quiet.refresh_from_db()
+        comment.refresh_from_db()
+        self.assertGreater(comment.approved_date, comment.created_date)
+        self.assertAlmostEqual(
+            self.quiet.trending_score, trending.event_score(trending.COMMENT_WEIGHT, comment.approved_date)
+        )
+
+    def test_unlike_and_rejection_are_subtracted(self):
+        kept = Like.objects.create(post=self.hot, user=self.users[0])
+        Like.objects.create(post=self.hot, user=self.users[1])
+        comment = Comment.objects.create(post=self.warm, author=self.users[0], text='Ok', approved_comment=True)
+        self.run_command()
+
+        Like.objects.filter(post=self.hot, user=self.users[1]).delete()
+        moderate_comments([comment.pk], approve=False)
+        self.run_command()
+        self.hot.refresh_from_db()
+        self.warm.refresh_from_db()
+        self.assertAlmostEqual(self.hot.trending_score, trending.event_score(trending.LIKE_WEIGHT, kept.created_date))
+        self.assertIsNone(self.warm.trending_score)
+        self.assertFalse(TrendingRecount.objects.exists())
+
+
+class NewsletterCommandsTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write_csv(self, content):
+        path = os.path.join(self.tmpdir.name, 'emails.csv')
+        with open(path, 'w', encoding='utf-8') as csv_file:
+            csv_file.write(content)
+        return path
+
+    def test_import_normalizes_and_deduplicates(self):
+        Newsletter.objects.create(email='old@example.com', is_active=False)
+        path = self.write_csv(
+            'name,email\n'
+            'Ala,ala@example.com\n'
+            'Ala again, ALA@Example.com \n'
+            'Old,old@example.com\n'
+            'Bad,not-an-email\n'
+            'Ola,ola@example.com\n'
+        )
+        out = StringIO()
+        call_command('newsletter_import', path, '--batch-size', '2', stdout=out)
+
+        self.assertEqual(
+            sorted(Newsletter.objects.values_list('email', 'is_active')),
+            [('ala@example.com', True), ('ola@example.com', True), ('old@example.com', False)]
+        )
+        self.assertIn('dodano: 2', out.getvalue())
+        self.assertIn('niepoprawne: 1', out.getvalue())
+        self.assertIn('powtórzone w pliku: 1', out.getvalue())
+
+    def test_import_without_header(self):
+        path = self.write_csv('ala@example.com\nola@example.com\n')
+        call_command('newsletter_import', path, stdout=StringIO())
+        self.assertEqual(Newsletter.objects.count(), 2)
+
+    def test_export_streams_active_subscribers(self):
+        Newsletter.objects.create(email='ala@example.com')
+        Newsletter.objects.create(email='old@example.com', is_active=False)
+        out = StringIO()
+        call_command('newsletter_export', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], 'email,subscribed_date')
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], ['ala@example.com'])
+
+    def test_unsubscribe_bounce_list(self):
+        for email in ('ala@example.com', 'ola@example.com', 'ela@example.com'):
+            Newsletter.objects.create(email=email)
+        path = self.write_csv('email\nALA@example.com\nola@example.com\nunknown@example.com\n')
+        call_command('newsletter_unsubscribe', path, '--batch-size', '1', stdout=StringIO())
+        self.assertEqual(list(Newsletter.objects.filter(is_active=True).values_list('email', flat=True)),
+                         ['ela@example.com'])
+
+        call_command('newsletter_unsubscribe', path, '--delete', stdout=StringIO())
+        self.assertEqual(Newsletter.objects.count(), 1)
+
+
+class StaticSnapshotTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        cls.post = Post.objects.create(
+            title='Snapshot Post', content='Content', author=cls.user, published_date=timezone.now())
+        cls.draft = Post.objects.create(title='Draft', content='Content', author=cls.user)
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = tmpdir.name
+        settings_override = override_settings(STATIC_SNAPSHOTS_ENABLED=True, STATIC_SNAPSHOT_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def snapshot(self, *parts):
+        return os.path.join(self.root, *parts, 'index.html')
+
+    def build(self, *args):
+        call_command('build_snapshots', *args, stdout=StringIO())
+
+    def test_build_all(self):
+        self.build('--all')
+        with open(self.snapshot(), encoding='utf-8') as index:
+            self.assertIn('Snapshot Post', index.read())
+        self.assertTrue(os.path.exists(self.snapshot('post', str(self.post.pk))))
+        self.assertFalse(os.path.exists(self.snapshot('post', str(self.draft.pk))))
+
+    def test_snapshot_is_anonymous(self):
+        self.build('--all')
+        with open(self.snapshot('post', str(self.post.pk)), encoding='utf-8') as detail:
+            content = detail.read()
+        self.assertIn('Zaloguj się, aby dodać komentarz', content)
+        # Tylko formularz newslettera - jego token i tak jest pobierany przed wysłaniem.
+        self.assertEqual(content.count('name="csrfmiddlewaretoken"'), 1)
+
+    def test_like_invalidates_only_affected_files(self):
+        other = Post.objects.create(title='Other', content='C', author=self.user, published_date=timezone.now())
+        self.build('--all')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(post=self.post, user=self.user)
+
+        self.assertFalse(os.path.exists(self.snapshot()))
+        self.assertFalse(os.path.exists(self.snapshot('post', str(self.post.pk))))
+        self.assertTrue(os.path.exists(self.snapshot('post', str(other.pk))))
+        self.assertEqual(StaleSnapshot.objects.count(), 2)
+
+        self.build()
+        self.assertTrue(os.path.exists(self.snapshot('post', str(self.post.pk))))
+        self.assertEqual(StaleSnapshot.objects.count(), 0)
+
+    def test_pending_comment_does_not_invalidate(self):
+        self.build('--all')
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.user, text='Pending')
+        self.assertTrue(os.path.exists(self.snapshot('post', str(self.post.pk))))
+
+    def test_unapproved_comment_invalidates(self):
+        comment = Comment.objects.create(post=self.post, author=self.user, text='Visible', approved_comment=True)
+        self.build('--all')
+        with self.captureOnCommitCallbacks(execute=True):
+            comment = Comment.objects.get(pk=comment.pk)
+            comment.approved_comment = False
+            comment.save()
+        self.assertFalse(os.path.exists(self.snapshot('post', str(self.post.pk))))
+        self.assertIn(reverse('post_detail', args=[self.post.pk]), StaleSnapshot.objects.values_list('path', flat=True))
+
+    def test_deleted_post_snapshot_is_removed(self):
+        self.build('--all')
+        path = self.snapshot('post', str(self.post.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.get(pk=self.post.pk).delete()
+        self.build()
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(self.snapshot()))
+
+    def test_related_post_changes_invalidate_pages(self):
+        other = Post.objects.create(title='Snapshot Twin', content='Content', author=self.user,
+                                    published_date=timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('update_related_posts', stdout=StringIO())
+        self.assertEqual(
+            set(StaleSnapshot.objects.values_list('path', flat=True)),
+            {reverse('post_detail', args=[self.post.pk]), reverse('post_detail', args=[other.pk])}
+        )
+
+        self.build()
+        with self.captureOnCommitCallbacks(execute=True):
+            other.title = 'Renamed Twin'
+            other.save()
+        self.assertFalse(os.path.exists(self.snapshot('post', str(self.post.pk))))
+
+    def test_disabled_by_default(self):
+        with override_settings(STATIC_SNAPSHOTS_ENABLED=False):
+            with self.captureOnCommitCallbacks(execute=True):
+                Like.objects.create(post=self.post, user=self.user)
+        self.assertEqual(StaleSnapshot.objects.count(), 0)
+
+    def test_newsletter_signup_uses_token_fetched_at_runtime(self):
+        client = Client(enforce_csrf_checks=True)
+        response = client.post(reverse('newsletter_signup'), {'email': 'static@example.com'})
+        self.assertEqual(response.status_code, 403)
+
+        response = client.get(reverse('newsletter_csrf'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        response = client.post(reverse('newsletter_signup'), {
+            'email': 'static@example.com', 'csrfmiddlewaretoken': response.json()['token'],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Newsletter.objects.filter(email='static@example.com').exists())
+
+
+class HealthCheckTest(TestCase):
+    def test_healthz_does_not_touch_database(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/healthz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'ok'})
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_healthz_skips_host_validation_and_sessions(self):
+        response = self.client.get('/healthz', HTTP_HOST='10.0.0.7:8000')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Vary', response)
+
+    def test_readyz_ok(self):
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['checks'], {'database': 'ok', 'cache': 'ok'})
+
+    def test_readyz_reports_failed_check(self):
+        from django.db import OperationalError
+        from . import health
+
+        with mock.patch.dict(health.CHECKS, database=mock.Mock(side_effect=OperationalError('down'))), \
+                self.assertLogs('blog.health', 'WARNING'):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {
+            'status': 'unavailable',
+            'checks': {'database': 'OperationalError', 'cache': 'ok'},
+        })
+
+
+    def test_readyz_unreachable_database(self):
+        from django.db import connections
+        from . import health
+
+        # Zamknięty port - serwer odrzuca połączenie.
+        unreachable = {'ENGINE': 'django.db.backends.postgresql', 'HOST': '127.0.0.1', 'PORT': '1', 'NAME': 'blog'}
+        with mock.patch.dict(connections.settings['default'], unreachable), \
+                self.assertLogs('blog.health', 'WARNING'):
+            self.assertEqual(health.probe_connection().get_connection_params()['connect_timeout'], 2)
+            started = time.monotonic()
+            response = self.client.get('/readyz')
+        self.assertLess(time.monotonic() - started, settings.HEALTHCHECK_TIMEOUT + 1)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['checks'], {'database': 'OperationalError', 'cache': 'ok'})
+
+    def test_network_cache_has_socket_timeout(self):
+        settings_file = os.path.join(settings.BASE_DIR, 'blog_project', 'settings.py')
+        with mock.patch.dict(os.environ, CACHE_BACKEND='django.core.cache.backends.redis.RedisCache'):
+            project_settings = runpy.run_path(settings_file)
+        self.assertEqual(project_settings['CACHES']['default']['OPTIONS'], {
+            'socket_connect_timeout': project_settings['CACHE_SOCKET_TIMEOUT'],
+            'socket_timeout': project_settings['CACHE_SOCKET_TIMEOUT'],
+        })
+
+
+class WarmUpTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        cls.post = Post.objects.create(
+            title='Hot Post', content='Content', author=cls.user,
+            published_date=timezone.now(), trending_score=trending.event_score(1, timezone.now())
+        )
+
+    def test_warm_up(self):
+        from . import warmup
+
+        with self.assertLogs('blog.warmup', 'INFO'):
+            results = warmup.warm_up(hot_posts=5)
+        self.assertGreater(results['urls'], 0)
+        self.assertIn('blog/post_detail.html', warmup.project_templates())
+        self.assertNotIn('admin/base.html', warmup.project_templates())
+        self.assertEqual(results['pages'], 2)
+
+    def test_warm_up_primes_object_cache(self):
+        from . import warmup
+
+        cache.clear()
+        warmup.prime_pages(hot_posts=5)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_object(Post, self.post.pk).title, 'Hot Post')
+
+    def test_warm_up_writes_snapshots_when_enabled(self):
+        from . import warmup
+
+        with tempfile.TemporaryDirectory() as root, \
+                override_settings(STATIC_SNAPSHOTS_ENABLED=True, STATIC_SNAPSHOT_ROOT=root):
+            warmup.prime_pages(hot_posts=5)
+            self.assertTrue(os.path.exists(os.path.join(root, 'index.html')))
+            self.assertTrue(os.path.exists(os.path.join(root, 'post', str(self.post.pk), 'index.html')))
+
+    def test_failing_step_does_not_raise(self):
+        from . import warmup
+
+        with mock.patch.object(warmup.snapshots, 'render_snapshot', side_effect=RuntimeError('boom')), \
+                self.assertLogs('blog.warmup', 'ERROR'):
+            results = warmup.warm_up(hot_posts=5)
+        self.assertIsNone(results['pages'])
+        self.assertIsNotNone(results['templates'])
+
+
+class ScheduledPublishingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        cls.other = User.objects.create_user(username='other', password='testpass123')
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+
+    def schedule(self, delta, title='Scheduled'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(
+                title=title, content='Content', author=self.user, published_date=self.now + delta)
+
+    def test_next_publish_time(self):
+        self.assertIsNone(scheduling.next_publish_time())
+        later = self.schedule(timedelta(hours=2))
+        sooner = self.schedule(timedelta(hours=1))
+        self.assertEqual(scheduling.next_publish_time(), sooner.published_date)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(scheduling.is_due(self.now))
+        self.assertTrue(scheduling.is_due(later.published_date))
+
+    def test_publish_due_touches_only_posts_going_live(self):
+        sooner = self.schedule(timedelta(hours=1))
+        later = self.schedule(timedelta(hours=2))
+        posts_version = get_version('posts')
+        later_version = get_version(f'post:{later.pk}')
+
+        self.assertEqual(scheduling.publish_due(self.now), [])
+        self.assertEqual(get_version('posts'), posts_version)
+
+        self.assertEqual(scheduling.publish_due(sooner.published_date), [sooner.pk])
+        self.assertNotEqual(get_version('posts'), posts_version)
+        self.assertEqual(get_version(f'post:{later.pk}'), later_version)
+        self.assertEqual(scheduling.next_publish_time(), later.published_date)
+
+        # Drugie wywołanie dla tej samej chwili nic już nie robi.
+        self.assertEqual(scheduling.publish_due(sooner.published_date), [])
+
+    def test_archive_counts_post_once_it_goes_live(self):
+        post = self.schedule(timedelta(hours=1))
+        month = timezone.localtime(post.published_date)
+        rebuilt = lambda: list(PostArchiveMonth.objects.filter(post_count__gt=0).values_list('year', 'month'))
+        self.assertEqual(rebuilt(), [])
+        call_command('rebuild_post_archive', stdout=StringIO())
+        self.assertEqual(rebuilt(), [])
+
+        scheduling.publish_due(post.published_date)
+        self.assertEqual(rebuilt(), [(month.year, month.month)])
+
+    def test_checkpoint_never_moves_backwards(self):
+        sooner = self.schedule(timedelta(hours=1))
+        later = self.schedule(timedelta(hours=2))
+        self.assertEqual(scheduling.publish_due(later.published_date), [sooner.pk, later.pk])
+        # Wolniejsze równoległe wywołanie, które sprawdziło termin przed pierwszym.
+        with mock.patch.object(scheduling, 'next_publish_time', return_value=sooner.published_date):
+            self.assertEqual(scheduling.publish_due(sooner.published_date), [])
+        self.assertEqual(JobCheckpoint.objects.get(name=scheduling.CHECKPOINT).checkpoint, later.published_date)
+
+    def test_next_publish_time_only_reads(self):
+        self.schedule(timedelta(hours=1))
+        scheduling.reschedule()
+        with CaptureQueriesContext(connection) as queries:
+            scheduling.next_publish_time()
+        self.assertEqual(len(queries), 2)
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries.captured_queries))
+
+    def assert_post_went_live(self, post, tag):
+        month = timezone.localtime(post.published_date)
+        tag.refresh_from_db()
+        self.assertEqual(tag.post_count, 1)
+        self.assertEqual(PostArchiveMonth.objects.get(year=month.year, month=month.month).post_count, 1)
+        self.assertEqual(AuthorStats.objects.get(author=self.user).post_count, 1)
+
+    def test_post_due_before_key_is_recomputed_still_goes_live(self):
+        # Klucz wygasł (albo inny worker ma własny cache) dopiero po terminie publikacji.
+        tag = Tag.objects.create(name='Later', slug='later')
+        post = self.schedule(timedelta(minutes=5))
+        post.tags.add(tag)
+        after = post.published_date + timedelta(minutes=20)
+        cache.delete(scheduling.NEXT_PUBLISH_KEY)
+        with mock.patch('django.utils.timezone.now', return_value=after):
+            self.assertEqual(scheduling.publish_due(), [post.pk])
+            self.assert_post_went_live(post, tag)
+
+    def test_missing_checkpoint_row_does_not_lose_posts(self):
+        JobCheckpoint.objects.filter(name=scheduling.CHECKPOINT).delete()
+        tag = Tag.objects.create(name='Later', slug='later')
+        post = self.schedule(timedelta(minutes=5))
+        post.tags.add(tag)
+        cache.delete(scheduling.NEXT_PUBLISH_KEY)
+        with mock.patch('django.utils.timezone.now', return_value=post.published_date + timedelta(minutes=20)):
+            self.assertEqual(scheduling.publish_due(), [post.pk])
+            self.assert_post_went_live(post, tag)
+        self.assertTrue(JobCheckpoint.objects.filter(name=scheduling.CHECKPOINT).exists())
+
+    def test_rescheduling_moves_next_publish_time(self):
+        post = self.schedule(timedelta(hours=3))
+        self.assertEqual(scheduling.next_publish_time(), post.published_date)
+        post.published_date = self.now + timedelta(minutes=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        self.assertEqual(scheduling.next_publish_time(), post.published_date)
+
+    def test_api_etag_changes_when_post_goes_live(self):
+        post = self.schedule(timedelta(seconds=30))
+        response = self.client.get(reverse('api_post_list'))
+        self.assertEqual(response.json()['results'], [])
+        etag = response['ETag']
+
+        with mock.patch('django.utils.timezone.now', return_value=post.published_date + timedelta(seconds=1)):
+            response = self.client.get(reverse('api_post_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.json()['results']], [post.pk])
+
+    def test_snapshots_invalidated_when_post_goes_live(self):
+        with tempfile.TemporaryDirectory() as root, \
+                override_settings(STATIC_SNAPSHOTS_ENABLED=True, STATIC_SNAPSHOT_ROOT=root):
+            post = self.schedule(timedelta(minutes=5))
+            StaleSnapshot.objects.all().delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                scheduling.publish_due(post.published_date)
+            self.assertEqual(
+                set(StaleSnapshot.objects.values_list('path', flat=True)),
+                {reverse('post_list'), reverse('post_detail', args=[post.pk])}
+            )
+
+    def test_scheduled_post_hidden_until_published(self):
+        post = self.schedule(timedelta(hours=1))
+        url = reverse('post_detail', args=[post.pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertNotContains(self.client.get(reverse('post_list')), 'Scheduled')
+
+        self.client.login(username='other', password='testpass123')
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.login(username='testuser', password='testpass123')
+        self.assertContains(self.client.get(url), 'Zaplanowany')
+
+    def test_post_new_with_publish_date(self):
+        self.client.login(username='testuser', password='testpass123')
+        publish_at = timezone.localtime(self.now + timedelta(days=1)).replace(second=0, microsecond=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('post_new'), {
+                'title': 'Tomorrow',
+                'content': 'Content',
+                'published_date': publish_at.strftime('%Y-%m-%dT%H:%M'),
+            })
+        post = Post.objects.get(title='Tomorrow')
+        self.assertEqual(post.published_date, publish_at)
+        self.assertEqual(scheduling.next_publish_time(), publish_at)
+
+
+class ObjectCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        cls.other = User.objects.create_user(username='other', password='testpass123')
+        cls.post = Post.objects.create(
+            title='Cached Post', content='Content', author=cls.user, published_date=timezone.now())
+
+    def setUp(self):
+        cache.clear()
+
+    def test_get_object_reads_through_cache(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_object(Post, self.post.pk).title, 'Cached Post')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_object(Post, self.post.pk).title, 'Cached Post')
+        self.assertIsNone(get_object(Post, 9999))
+
+    def test_save_invalidates_cached_object(self):
+        get_object(Post, self.post.pk)
+        get_object(User, self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.get(pk=self.post.pk)
+            post.title = 'Renamed'
+            post.save()
+            user = User.objects.get(pk=self.user.pk)
+            user.username = 'renamed'
+            user.save()
+        self.assertEqual(get_object(Post, self.post.pk).title, 'Renamed')
+        self.assertEqual(get_object(User, self.user.pk).username, 'renamed')
+
+    def test_read_between_save_and_commit_is_not_kept(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.get(pk=self.post.pk)
+            post.title = 'Uncommitted'
+            post.save()
+            # Inny proces mógłby tu jeszcze zapisać w cache poprzednią wersję wiersza.
+            stale_version = get_version(f'post:{self.post.pk}')
+        self.assertNotEqual(get_version(f'post:{self.post.pk}'), stale_version)
+
+    def test_get_objects_batches_misses(self):
+        get_object(User, self.user.pk)
+        with self.assertNumQueries(1):
+            users = get_objects(User, [self.user.pk, self.other.pk])
+        self.assertEqual({user.username for user in users.values()}, {'testuser', 'other'})
+        with self.assertNumQueries(0):
+            get_objects(User, [self.user.pk, self.other.pk])
+
+    def test_hot_post_detail_does_not_query_post_or_author(self):
+        Comment.objects.create(post=self.post, author=self.other, text='Hi', approved_comment=True)
+        url = reverse('post_detail', args=[self.post.pk])
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, 'testuser')
+        self.assertContains(response, 'other')
+        tables = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('FROM "blog_post" WHERE "blog_post"."id"', tables)
+        self.assertNotIn('"auth_user"', tables)
+
+    def test_post_edit_keeps_counters_of_cached_post(self):
+        get_object(Post, self.post.pk)
+        Post.objects.filter(pk=self.post.pk).update(comment_count=7)
+        self.client.login(username='testuser', password='testpass123')
+        self.client.post(reverse('post_edit', args=[self.post.pk]), {'title': 'Edited', 'content': 'Content'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, 'Edited')
+        self.assertEqual(self.post.comment_count, 7)
+
+
+class ProfilingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        cls.post = Post.objects.create(
+            title='Profiled Post', content='Content', author=cls.staff, published_date=timezone.now())
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.directory = tmpdir.name
+        settings_override = override_settings(
+            PROFILING_ENABLED=True, PROFILING_DIR=self.directory, PROFILING_SAMPLE_RATE=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_disabled_middleware_is_not_loaded(self):
+        from .middleware import ProfilingMiddleware
+        from django.core.exceptions import MiddlewareNotUsed
+
+        with override_settings(PROFILING_ENABLED=False), self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: None)
+
+    def test_request_without_token_is_not_profiled(self):
+        self.client.get(reverse('post_detail', args=[self.post.pk]))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_invalid_token_is_ignored(self):
+        self.client.get(reverse('post_detail', args=[self.post.pk]), HTTP_X_BLOG_PROFILE='forged')
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_signed_header_writes_pstats(self):
+        token = profiling.make_token(self.staff)
+        self.client.get(reverse('post_detail', args=[self.post.pk]), HTTP_X_BLOG_PROFILE=token)
+
+        profiles = profiling.list_profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(profiles[0]['name'], 'post_detail')
+        self.assertEqual(profiles[0]['method'], 'GET')
+        self.assertEqual(profiles[0]['format'], 'prof')
+
+        import pstats
+        stats = pstats.Stats(os.path.join(self.directory, profiles[0]['file']))
+        self.assertTrue(any(function == 'post_detail' for _, _, function in stats.stats))
+
+    def test_sample_mode_writes_collapsed_stacks(self):
+        sampler = profiling.StackSampler(interval=0.001)
+        sampler.start()
+        deadline = time.monotonic() + 0.05
+        while time.monotonic() < deadline:
+            pass
+        sampler.stop()
+        path = os.path.join(self.directory, 'stacks.collapsed')
+        sampler.dump(path)
+        with open(path, encoding='utf-8') as collapsed:
+            line = collapsed.readline()
+        self.assertIn('test_sample_mode_writes_collapsed_stacks', line)
+        self.assertRegex(line, r' \d+\n$')
+
+    def test_sampling_rate(self):
+        with override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_MODE='sample'):
+            self.client.get(reverse('post_list'))
+        self.assertEqual([profile['format'] for profile in profiling.list_profiles()], ['collapsed'])
+
+    def test_old_profiles_are_pruned(self):
+        token = profiling.make_token(self.staff)
+        with override_settings(PROFILING_KEEP=2):
+            for _ in range(3):
+                self.client.get(reverse('post_list'), HTTP_X_BLOG_PROFILE=token)
+        self.assertEqual(len(profiling.list_profiles()), 2)
+
+    def test_profile_list_view(self):
+        token = profiling.make_token(self.staff)
+        self.client.get(reverse('post_detail', args=[self.post.pk]), HTTP_X_BLOG_PROFILE=token)
+        self.client.get(reverse('post_list'), HTTP_X_BLOG_PROFILE=token)
+
+        self.client.login(username='staff', password='testpass123')
+        response = self.client.get(reverse('profile_list'), {'name': 'post_detail'})
+        self.assertEqual([profile['name'] for profile in response.context['profiles']], ['post_detail'])
+
+        file_name = response.context['profiles'][0]['file']
+        response = self.client.get(reverse('profile_detail', args=[file_name]))
+        self.assertContains(response, 'cumulative')
+        response = self.client.get(reverse('profile_detail', args=[file_name]), {'download': 1})
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="{file_name}"')
+
+    def test_enable_cookie(self):
+        self.client.login(username='staff', password='testpass123')
+        response = self.client.post(reverse('profile_list'), {'action': 'enable'})
+        self.assertTrue(profiling.valid_token(response.cookies[profiling.COOKIE].value))
+
+    def test_profile_views_require_staff(self):
+        response = self.client.get(reverse('profile_list'))
+        self.assertEqual(response.status_code, 302)
+        self.client.login(username='staff', password='testpass123')
+        response = self.client.get(reverse('profile_detail', args=['..%2Fsettings.py']))
+        self.assertEqual(response.status_code, 404)
+
+
+class AuthorStatsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author', password='testpass123')
+        cls.reader = User.objects.create_user(username='reader', password='testpass123')
+        cls.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        cls.post = Post.objects.create(
+            title='First', content='Content', author=cls.author, published_date=timezone.now())
+
+    def stats(self, user=None):
+        stats = AuthorStats.objects.get(author=user or self.author)
+        return stats.post_count, stats.like_count, stats.comment_count
+
+    def test_posts_are_counted(self):
+        self.assertEqual(self.stats(), (1, 0, 0))
+        draft = Post.objects.create(title='Draft', content='Content', author=self.author)
+        self.assertEqual(self.stats(), (1, 0, 0))
+        draft.publish()
+        self.assertEqual(self.stats(), (2, 0, 0))
+        Post.objects.get(pk=draft.pk).delete()
+        self.assertEqual(self.stats(), (1, 0, 0))
+
+    def test_like_post_view_updates_likes(self):
+        self.client.login(username='reader', password='testpass123')
+        self.client.post(reverse('like_post', args=[self.post.pk]))
+        self.assertEqual(self.stats(), (1, 1, 0))
+        self.client.post(reverse('like_post', args=[self.post.pk]))
+        self.assertEqual(self.stats(), (1, 0, 0))
+
+    def test_only_approved_comments_are_counted(self):
+        comment = Comment.objects.create(post=self.post, author=self.reader, text='Hi')
+        self.assertEqual(self.stats(), (1, 0, 0))
+        comment.approve()
+        self.assertEqual(self.stats(), (1, 0, 1))
+        moderate_comments([comment.pk], approve=False)
+        self.assertEqual(self.stats(), (1, 0, 0))
+        moderate_comments([comment.pk], approve=True)
+        Comment.objects.get(pk=comment.pk).delete()
+        self.assertEqual(self.stats(), (1, 0, 0))
+
+    def test_deleting_post_removes_its_likes_and_comments(self):
+        Like.objects.create(post=self.post, user=self.reader)
+        Comment.objects.create(post=self.post, author=self.reader, text='Hi', approved_comment=True)
+        self.assertEqual(self.stats(), (1, 1, 1))
+        Post.objects.get(pk=self.post.pk).delete()
+        self.assertEqual(self.stats(), (0, 0, 0))
+
+    def test_deleting_post_subtracts_totals_once(self):
+        readers = [User.objects.create_user(username=f'reader{i}') for i in range(50)]
+        Like.objects.bulk_create([Like(post=self.post, user=reader) for reader in readers])
+        AuthorStats.objects.filter(author=self.author).update(like_count=50)
+        post = Post.objects.get(pk=self.post.pk)
+        with CaptureQueriesContext(connection) as queries:
+            post.delete()
+        self.assertLess(len(queries), 15)
+        self.assertEqual(self.stats(), (0, 0, 0))
+        self.assertFalse(TrendingRecount.objects.exists())
+
+    def test_deleting_author_whose_post_has_foreign_like(self):
+        Like.objects.create(post=self.post, user=self.reader)
+        Comment.objects.create(post=self.post, author=self.reader, text='Hi', approved_comment=True)
+        User.objects.get(pk=self.author.pk).delete()
+        self.assertFalse(AuthorStats.objects.filter(author_id=self.author.pk).exists())
+        self.assertFalse(Like.objects.exists())
+
+    def test_decrement_does_not_go_negative_or_recreate_row(self):
+        like = Like.objects.create(post=self.post, user=self.reader)
+        AuthorStats.objects.filter(author=self.author).update(like_count=0)
+        like.delete()
+        self.assertEqual(self.stats(), (1, 0, 0))
+
+        AuthorStats.objects.filter(author=self.author).delete()
+        Like.objects.create(post=self.post, user=self.reader).delete()
+        self.assertEqual(self.stats(), (1, 0, 0))
+        AuthorStats.objects.filter(author=self.author).delete()
+        Post.objects.get(pk=self.post.pk).delete()
+        self.assertFalse(AuthorStats.objects.exists())
+
+    def test_scheduled_post_counted_once_live(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            scheduled = Post.objects.create(title='Later', content='Content', author=self.author,
+                                            published_date=timezone.now() + timedelta(hours=1))
+        self.assertEqual(self.stats(), (1, 0, 0))
+        scheduling.publish_due(scheduled.published_date)
+        self.assertEqual(self.stats(), (2, 0, 0))
+
+    def test_changing_author_moves_counts(self):
+        Like.objects.create(post=self.post, user=self.reader)
+        self.client.login(username='staff', password='testpass123')
+        self.client.post(reverse('post_edit', args=[self.post.pk]), {'title': 'Taken over', 'content': 'Content'})
+        self.assertEqual(self.stats(), (0, 0, 0))
+        self.assertEqual(self.stats(self.staff), (1, 1, 0))
+
+    def test_rebuild_matches_incremental_counts(self):
+        Like.objects.create(post=self.post, user=self.reader)
+        Comment.objects.create(post=self.post, author=self.reader, text='Hi', approved_comment=True)
+        expected = self.stats()
+        AuthorStats.objects.all().delete()
+        call_command('rebuild_author_stats', stdout=StringIO())
+        self.assertEqual(self.stats(), expected)
+
+
+class AuthorDetailViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author', password='testpass123')
+        cls.other = User.objects.create_user(username='other', password='testpass123')
+        now = timezone.now()
+        cls.posts = [
+            Post.objects.create(
+                title=f'Post {i}', content='Content', author=cls.author,
+                published_date=now - timedelta(hours=i))
+            for i in range(12)
+        ]
+        Post.objects.create(title='Scheduled', content='C', author=cls.author, published_date=now + timedelta(days=1))
+        Post.objects.create(title='Foreign', content='C', author=cls.other, published_date=now)
+        Like.objects.create(post=cls.posts[0], user=cls.other)
+
+    def test_author_page(self):
+        response = self.client.get(reverse('author_detail', args=['author']))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'blog/author_detail.html')
+        self.assertEqual([post.title for post in response.context['posts']], [f'Post {i}' for i in range(10)])
+        self.assertNotContains(response, 'Foreign')
+        self.assertNotContains(response, 'Scheduled')
+        self.assertEqual(response.context['stats'].like_count, 1)
+
+        response = self.client.get(reverse('author_detail', args=['author']), {'before': response.context['next_cursor']})
+        self.assertEqual([post.title for post in response.context['posts']], ['Post 10', 'Post 11'])
+
+    def test_stats_are_not_aggregated_on_view(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('author_detail', args=['author']))
+        for query in queries:
+            self.assertNotIn('"blog_comment"', query['sql'])
+            # Karty postów liczą polubienia pojedynczego posta - bez złączenia po autorze.
+            if '"blog_like"' in query['sql']:
+                self.assertNotIn('"blog_post"', query['sql'])
+
+    def test_unknown_author(self):
+        response = self.client.get(reverse('author_detail', args=['nobody']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_profile_redirects_to_own_author_page(self):
+        self.client.login(username='other', password='testpass123')
+        response = self.client.get(reverse('profile'))
+        self.assertRedirects(response, reverse('author_detail', args=['other']))
+
+    def test_post_card_links_to_author(self):
+        response = self.client.get(reverse('post_list'))
+        self.assertContains(response, reverse('author_detail', args=['author']))
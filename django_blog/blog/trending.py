@@ -0,0 +1,53 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.utils import timezone
+
+
+# Wynik posta to suma wag zdarzeń (polubienie, komentarz) wygaszana
+# wykładniczo z czasem połowicznego zaniku HALF_LIFE. Przechowujemy logarytm
+# tej sumy liczony względem stałej EPOCH zamiast "teraz": wygaszanie mnoży
+# wszystkie wyniki przez ten sam czynnik, więc kolejność się nie zmienia i
+# posty bez nowej aktywności nie wymagają żadnych aktualizacji.
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+HALF_LIFE_SECONDS = 24 * 60 * 60
+DECAY_RATE = math.log(2) / HALF_LIFE_SECONDS
+
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+
+# update_trending liczy tylko zdarzenia starsze niż SETTLE_SECONDS. Data
+# polubienia czy zatwierdzenia jest ustalana przed zatwierdzeniem transakcji,
+# więc świeże zdarzenie może jeszcze nie być widoczne, a punkt kontrolny
+# przesunięty za nie pominąłby je na zawsze.
+SETTLE_SECONDS = 60
+
+# Posty, których bieżący (wygaszony) wynik spadł poniżej tej wartości,
+# nie są już uznawane za popularne.
+MIN_SCORE = 0.5
+
+
+def event_score(weight, when):
+    return math.log(weight) + (when - EPOCH).total_seconds() * DECAY_RATE
+
+
+def add_scores(*scores):
+    """Logarytm sumy - odpowiednik dodawania wyników w skali liniowej."""
+    scores = [score for score in scores if score is not None]
+    if not scores:
+        return None
+    highest = max(scores)
+    return highest + math.log(sum(math.exp(score - highest) for score in scores))
+
+
+def cutoff(now=None):
+    return event_score(MIN_SCORE, now or timezone.now())
+
+
+def queue_recount(post_ids):
+    """Kolejkuje posty do pełnego przeliczenia przez update_trending."""
+    from .models import TrendingRecount
+
+    TrendingRecount.objects.bulk_create(
+        [TrendingRecount(post_id=post_id) for post_id in post_ids], ignore_conflicts=True
+    )
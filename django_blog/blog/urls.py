@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.post_list, name='post_list'),
@@ -7,5 +7,17 @@ urlpatterns = [
     path('post/new/', views.post_new, name='post_new'),
     path('post/<int:pk>/edit/', views.post_edit, name='post_edit'),
     path('post/<int:pk>/like/', views.like_post, name='like_post'),
-    path('newsletter/signup/', views.newsletter_signup, name='newsletter_signup')
+    path('trending/', views.trending_list, name='trending'),
+    path('tag/<slug:slug>/', views.tag_detail, name='tag_detail'),
+    path('archive/<int:year>/<int:month>/', views.post_archive, name='post_archive'),
+    path('author/<str:username>/', views.author_detail, name='author_detail'),
+    path('moderation/comments/', views.moderation_queue, name='moderation_queue'),
+    path('moderation/comments/moderate/', views.moderate, name='moderate_comments'),
+    path('profiling/', views.profile_list, name='profile_list'),
+    path('profiling/<str:file_name>/', views.profile_detail, name='profile_detail'),
+    path('api/posts/', api.post_list, name='api_post_list'),
+    path('api/posts/<int:pk>/', api.post_detail, name='api_post_detail'),
+    path('api/posts/<int:pk>/comments/', api.comment_list, name='api_comment_list'),
+    path('newsletter/signup/', views.newsletter_signup, name='newsletter_signup'),
+    path('newsletter/csrf/', views.csrf_token, name='newsletter_csrf')
 ]
\ No newline at end of file
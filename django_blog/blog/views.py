@@ -1,20 +1,120 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import Post, Like, Newsletter
+from .models import Post, Comment, Like, Newsletter, Tag, RelatedPost, PostArchiveMonth, AuthorStats
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.http import require_POST
+from django.views.decorators.cache import never_cache
+from django.middleware.csrf import get_token
 from .forms import PostForm, CommentForm, NewsletterForm
 from django.utils import timezone
-from django.http import JsonResponse
+from django.http import FileResponse, JsonResponse, Http404
+from datetime import datetime
+from io import StringIO
+import pstats
+from django.conf import settings
 from django.contrib import messages
+from django.db import IntegrityError
+from .pagination import keyset_page
+from .cache import attach_authors, get_object
+from .moderation import moderate_comments
+from . import profiling, trending
 
 
 
+def trending_posts(limit):
+    now = timezone.now()
+    return Post.objects.filter(
+        published_date__lte=now,
+        trending_score__gte=trending.cutoff(now)
+    ).order_by('-trending_score')[:limit]
+
+def get_post_or_404(pk):
+    # Odczyt przez cache obiektów (blog/cache.py) zamiast zapytania przy każdym wyświetleniu.
+    post = get_object(Post, pk)
+    if post is None:
+        raise Http404
+    return post
+
+def sidebar_context():
+    now = timezone.localtime()
+    return {
+        'popular_tags': Tag.popular(),
+        'trending_posts': trending_posts(5),
+        'archive_months': PostArchiveMonth.objects.filter(post_count__gt=0, year__lte=now.year)
+            .exclude(year=now.year, month__gt=now.month)[:12]
+    }
+
 def post_list(request):
     posts = Post.objects.filter(published_date__lte=timezone.now()).order_by('-published_date')
-    return render(request, 'blog/post_list.html', {'posts': posts})
+    return render(request, 'blog/post_list.html', {
+        'posts': attach_authors(posts),
+        **sidebar_context()
+    })
+
+def trending_list(request):
+    return render(request, 'blog/trending.html', {
+        'posts': attach_authors(trending_posts(20)),
+        **sidebar_context()
+    })
+
+def tag_detail(request, slug):
+    tag = get_object_or_404(Tag, slug=slug)
+    posts = tag.posts.filter(published_date__lte=timezone.now())
+    posts, next_cursor = keyset_page(posts, request.GET.get('before'))
+
+    return render(request, 'blog/tag_detail.html', {
+        'tag': tag,
+        'posts': attach_authors(posts),
+        'next_cursor': next_cursor,
+        **sidebar_context()
+    })
+
+def author_detail(request, username):
+    author = get_object_or_404(User, username=username)
+    # Liczniki z AuthorStats zamiast agregacji po postach, polubieniach i komentarzach.
+    stats = AuthorStats.objects.filter(author=author).first() or AuthorStats(author=author)
+    posts = Post.objects.filter(author=author, published_date__lte=timezone.now())
+    posts, next_cursor = keyset_page(posts, request.GET.get('before'))
+    for post in posts:
+        post.author = author
+
+    return render(request, 'blog/author_detail.html', {
+        'author': author,
+        'stats': stats,
+        'posts': posts,
+        'next_cursor': next_cursor,
+        **sidebar_context()
+    })
+
+def post_archive(request, year, month):
+    try:
+        start = timezone.make_aware(datetime(year, month, 1))
+        end = timezone.make_aware(datetime(year + month // 12, month % 12 + 1, 1))
+    except ValueError:
+        raise Http404
+
+    # Zakres dat zamiast __year/__month, żeby zapytanie korzystało z indeksu na published_date.
+    posts = Post.objects.filter(
+        published_date__gte=start,
+        published_date__lt=end,
+        published_date__lte=timezone.now()
+    )
+    posts, next_cursor = keyset_page(posts, request.GET.get('before'))
+
+    return render(request, 'blog/post_archive.html', {
+        'month': start,
+        'posts': attach_authors(posts),
+        'next_cursor': next_cursor,
+        **sidebar_context()
+    })
 
 def post_detail(request, pk):
-    post = get_object_or_404(Post, pk=pk)
+    post = get_post_or_404(pk)
+    # Zaplanowane posty widzi przed publikacją tylko autor i redakcja.
+    if not post.is_published() and not (request.user.pk == post.author_id or request.user.is_staff):
+        raise Http404
 
     if request.method == "POST":
         form = CommentForm(request.POST)
@@ -24,13 +124,25 @@ def post_detail(request, pk):
             comment.post = post
             comment.author = request.user
             comment.save()
+            messages.info(request, 'Komentarz został dodany i pojawi się po zatwierdzeniu przez moderatora.')
             return redirect('post_detail', pk=post.pk)
     else:
         form = CommentForm()
-        
+
+    related_posts = [
+        related.related for related in
+        RelatedPost.objects.filter(post=post, related__published_date__lte=timezone.now())
+        .select_related('related')
+    ]
+
+    comments = list(post.comments.filter(approved_comment=True).order_by('created_date'))
+    attach_authors([post, *comments])
+
     return render(request, 'blog/post_detail.html', {
         'post': post,
-        'form': form
+        'comments': comments,
+        'form': form,
+        'related_posts': related_posts
     })
 
 @login_required
@@ -41,9 +153,11 @@ def post_new(request):
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
-            post.published_date = timezone.now()
+            if post.published_date is None:
+                post.published_date = timezone.now()
 
             post.save()
+            form.save_tags(post)
             return redirect('post_detail', pk=post.pk)
     else:
         form = PostForm()
@@ -52,14 +166,18 @@ def post_new(request):
 
 @login_required
 def post_edit(request, pk):
-    post = get_object_or_404(Post, pk=pk)
+    post = get_post_or_404(pk)
     if request.method == "POST":
         form = PostForm(request.POST, instance=post)
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
-            post.published_date = timezone.now()
-            post.save()
+            if post.published_date is None:
+                post.published_date = timezone.now()
+            # Obiekt może pochodzić z cache - nie nadpisujemy liczników
+            # (comment_count, trending_score) aktualizowanych w tle.
+            post.save(update_fields=[*PostForm.Meta.fields, 'author'])
+            form.save_tags(post)
             return redirect('post_detail', pk=post.pk)
     else:
         form = PostForm(instance=post)
@@ -67,7 +185,7 @@ def post_edit(request, pk):
 
 @login_required
 def like_post(request, pk):
-    post = get_object_or_404(Post, pk=pk)
+    post = get_post_or_404(pk)
     like, created = Like.objects.get_or_create(post=post, user=request.user)
 
     if not created:
@@ -78,6 +196,12 @@ def like_post(request, pk):
 
     return JsonResponse({'liked': liked, 'likes_count': post.likes.count()})
 
+# Statyczne kopie stron zawierają token, który nie pasuje do ciasteczka
+# czytelnika - formularz newslettera pobiera przed wysłaniem bieżący.
+@never_cache
+def csrf_token(request):
+    return JsonResponse({'token': get_token(request)})
+
 def newsletter_signup(request):
     if request.method == 'POST':
         form = NewsletterForm(request.POST)
@@ -85,9 +209,101 @@ def newsletter_signup(request):
             try:
                 form.save()
                 messages.success(request, 'Dziękujemy za zapisanie się do newslettera!')
-            except:
+            except IntegrityError:
                 messages.error(request, 'Ten adres email jest już zapisany do newslettera.')
+        elif form.has_error('email', 'unique'):
+            messages.error(request, 'Ten adres email jest już zapisany do newslettera.')
         else:
             messages.error(request, 'Podaj poprawny adres email.')
 
-    return redirect('post_list')
\ No newline at end of file
+    return redirect('post_list')
+
+MODERATION_PAGE_SIZE = 50
+
+@staff_member_required
+def moderation_queue(request):
+    pending = Comment.objects.filter(approved_comment=False, rejected_comment=False) \
+        .select_related('post', 'author')
+    comments, next_cursor = keyset_page(
+        pending, request.GET.get('cursor'), MODERATION_PAGE_SIZE, field='created_date'
+    )
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'results': [{
+                'id': comment.pk,
+                'post': comment.post.title,
+                'author': comment.author.username,
+                'text': comment.text,
+                'created_date': comment.created_date,
+            } for comment in comments],
+            'next_cursor': next_cursor
+        })
+
+    return render(request, 'blog/moderation_queue.html', {
+        'comments': comments,
+        'next_cursor': next_cursor
+    })
+
+@staff_member_required
+@require_POST
+def moderate(request):
+    action = request.POST.get('action')
+    if action not in ('approve', 'reject'):
+        return JsonResponse({'error': 'Nieznana akcja.'}, status=400)
+
+    ids = [pk for pk in request.POST.getlist('ids') if pk.isdigit()]
+    updated = moderate_comments(ids, approve=action == 'approve')
+    return JsonResponse({'updated': updated})
+
+
+PROFILE_LIST_SIZE = 200
+
+@staff_member_required
+def profile_list(request):
+    if request.method == 'POST':
+        response = redirect('profile_list')
+        if request.POST.get('action') == 'enable':
+            response.set_cookie(
+                profiling.COOKIE,
+                profiling.make_token(request.user),
+                max_age=profiling.TOKEN_MAX_AGE,
+                httponly=True,
+                samesite='Lax',
+                secure=request.is_secure()
+            )
+        else:
+            response.delete_cookie(profiling.COOKIE)
+        return response
+
+    name = request.GET.get('name')
+    return render(request, 'blog/profile_list.html', {
+        'profiles': profiling.list_profiles(name)[:PROFILE_LIST_SIZE],
+        'name': name,
+        'profiling_enabled': settings.PROFILING_ENABLED,
+        'sample_rate': settings.PROFILING_SAMPLE_RATE,
+        'cookie_set': profiling.COOKIE in request.COOKIES,
+        'token': profiling.make_token(request.user)
+    })
+
+@staff_member_required
+def profile_detail(request, file_name):
+    path = profiling.profile_path(file_name)
+    if path is None:
+        raise Http404
+
+    if request.GET.get('download'):
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=file_name)
+
+    if path.suffix == '.prof':
+        output = StringIO()
+        pstats.Stats(str(path), stream=output).sort_stats('cumulative').print_stats(40)
+        summary = output.getvalue()
+    else:
+        with open(path, encoding='utf-8') as collapsed:
+            summary = ''.join(collapsed.readlines()[:100])
+
+    return render(request, 'blog/profile_detail.html', {
+        'file_name': file_name,
+        'summary': summary
+    })
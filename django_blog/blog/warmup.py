@@ -0,0 +1,107 @@
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.template.loader import get_template
+from django.urls import get_resolver, reverse
+
+from .cache import get_version
+from . import snapshots
+
+logger = logging.getLogger(__name__)
+
+
+def load_urls():
+    resolver = get_resolver()
+    # reverse_dict buduje (i zapamiętuje) słowniki wszystkich wzorców URL.
+    resolver.reverse_dict
+    return len(resolver.url_patterns)
+
+
+def project_templates():
+    """Nazwy szablonów z katalogów projektu (bez szablonów admina i bibliotek)."""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    names = set()
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            directory = Path(directory).resolve()
+            if base_dir not in directory.parents:
+                continue
+            names.update(
+                path.relative_to(directory).as_posix()
+                for path in directory.rglob('*.html')
+            )
+    return sorted(names)
+
+
+def load_templates():
+    names = project_templates()
+    for name in names:
+        get_template(name)
+    return len(names)
+
+
+def prime_pages(hot_posts):
+    """
+    Renderuje stronę główną i najpopularniejsze posty. Gdy kopie statyczne są
+    włączone, zapisuje wynik do STATIC_SNAPSHOT_ROOT; w przeciwnym razie HTML
+    jest odrzucany - rozgrzewa tylko klucze wersji, cache obiektów (posty,
+    autorzy) i wczytane w tym procesie szablony. Stron jako całości nie
+    przechowujemy w żadnym cache.
+    """
+    from .views import trending_posts
+
+    post_ids = list(trending_posts(hot_posts).values_list('pk', flat=True))
+    get_version('posts')
+    get_version('trending')
+    for post_id in post_ids:
+        get_version(f'post:{post_id}')
+        get_version(f'comments:{post_id}')
+
+    paths = [reverse('post_list')] + snapshots.detail_paths(post_ids)
+    for path in paths:
+        if snapshots.enabled():
+            snapshots.write_snapshot(path)
+        else:
+            snapshots.render_snapshot(path)
+    return len(paths)
+
+
+def warm_up(hot_posts=None):
+    """
+    Przygotowuje świeżo uruchomiony worker: ładuje URL-e i szablony, łączy
+    się z bazą i rozgrzewa cache dla strony głównej i najpopularniejszych
+    postów (patrz prime_pages).
+    Błąd w którymkolwiek kroku jest tylko logowany - worker i tak wystartuje.
+    """
+    if hot_posts is None:
+        hot_posts = settings.WARMUP_HOT_POSTS
+
+    steps = [
+        ('urls', load_urls),
+        ('templates', load_templates),
+        ('pages', lambda: prime_pages(hot_posts)),
+    ]
+    results = {}
+    for name, step in steps:
+        started = time.monotonic()
+        try:
+            count = step()
+        except Exception:
+            logger.exception('Warm-up step %s failed', name)
+            results[name] = None
+        else:
+            results[name] = count
+            logger.info('Warm-up %s: %d in %.0f ms', name, count, (time.monotonic() - started) * 1000)
+
+    # Połączenia otwarte w wątku startowym nie przydadzą się wątkom obsługującym żądania.
+    connections.close_all()
+    return results
+
+
+def warm_up_on_start():
+    if settings.WARMUP_ON_START:
+        warm_up()
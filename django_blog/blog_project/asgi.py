@@ -13,4 +13,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blog_project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from blog.events import LiveEventsRouter  # noqa: E402
+from blog.warmup import warm_up_on_start  # noqa: E402
+
+# Runs once per worker process (gunicorn imports this module in each worker).
+warm_up_on_start()
+
+# /post/<pk>/events/ (SSE) is served outside Django's request cycle.
+application = LiveEventsRouter(django_application)
@@ -37,7 +37,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.HealthCheckMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.ProfilingMiddleware',
+    'blog.middleware.PrimaryPinMiddleware',
+    'blog.middleware.ScheduledPublishingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -77,10 +81,107 @@ DATABASES = {
         'USER': os.environ.get('POSTGRES_USER','bloguser'),
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'blogpass'),
         'HOST': os.environ.get('POSTGRES_HOST', 'db'),
-        'PORT': os.environ.get('POSTGRES_PORT', '5432')
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('POSTGRES_CONNECT_TIMEOUT', '5')),
+        },
     }
 }
 
+# Read replicas, e.g. POSTGRES_REPLICAS=replica1:5432=3,replica2=1
+# (host[:port][=weight]). Reads are spread by weight, writes go to 'default'.
+REPLICA_WEIGHTS = {}
+
+for index, entry in enumerate(filter(None, os.environ.get('POSTGRES_REPLICAS', '').split(',')), start=1):
+    address, _, weight = entry.partition('=')
+    host, _, port = address.partition(':')
+    alias = f'replica{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_WEIGHTS[alias] = int(weight or 1)
+
+DATABASE_ROUTERS = ['blog.routers.PrimaryReplicaRouter']
+
+# After a write the client reads from the primary for this many seconds.
+REPLICA_PIN_COOKIE = 'db_primary_pin'
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', '5'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Network caches must fail fast instead of hanging requests (and /readyz)
+# while the cache server is unreachable.
+CACHE_SOCKET_TIMEOUT = float(os.environ.get('CACHE_SOCKET_TIMEOUT', '1'))
+if CACHES['default']['BACKEND'] == 'django.core.cache.backends.redis.RedisCache':
+    CACHES['default']['OPTIONS'] = {
+        'socket_connect_timeout': CACHE_SOCKET_TIMEOUT,
+        'socket_timeout': CACHE_SOCKET_TIMEOUT,
+    }
+elif CACHES['default']['BACKEND'] == 'django.core.cache.backends.memcached.PyMemcacheCache':
+    CACHES['default']['OPTIONS'] = {
+        'connect_timeout': CACHE_SOCKET_TIMEOUT,
+        'timeout': CACHE_SOCKET_TIMEOUT,
+    }
+
+
+# Sessions and messages
+# 'cached_db' (default) reads sessions from the cache and only falls back to the
+# database on a miss; 'signed_cookies' keeps them entirely client-side.
+# Messages live in a cookie, so anonymous visitors never create session rows.
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.environ.get('SESSION_BACKEND', 'cached_db')
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
+# Live like/comment counts (SSE): 'local' fans out within a worker process,
+# 'postgres' also relays events between workers through LISTEN/NOTIFY.
+LIVE_EVENTS_BACKEND = os.environ.get('LIVE_EVENTS_BACKEND', 'local')
+
+
+# Admin changelists show an estimated row count (pg_class) above this size.
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+# Static HTML snapshots of public pages, served by nginx to anonymous readers
+# (see build_snapshots). Django stays the fallback for logged-in users and misses.
+STATIC_SNAPSHOTS_ENABLED = os.environ.get('STATIC_SNAPSHOTS_ENABLED', 'False') == 'True'
+STATIC_SNAPSHOT_ROOT = os.environ.get('STATIC_SNAPSHOT_ROOT', str(BASE_DIR / 'snapshots'))
+
+
+# Health checks: /healthz (liveness, no I/O) and /readyz (database and cache ping).
+# A check that does not answer within HEALTHCHECK_TIMEOUT seconds counts as failed.
+HEALTHCHECK_TIMEOUT = float(os.environ.get('HEALTHCHECK_TIMEOUT', '2'))
+
+# When a worker starts (blog.warmup), load URLs and templates and render the front
+# page and the hottest posts to fill the version keys and the object cache (and
+# the static snapshots, when enabled), so the first requests after a deploy
+# don't start cold.
+WARMUP_ON_START = os.environ.get('WARMUP_ON_START', 'False') == 'True'
+WARMUP_HOT_POSTS = int(os.environ.get('WARMUP_HOT_POSTS', '10'))
+
+
+# Request profiling (blog.profiling). With PROFILING_ENABLED the middleware profiles
+# requests carrying a signed token (header X-Blog-Profile or a cookie, both issued
+# to staff at /profiling/) and a random PROFILING_SAMPLE_RATE fraction of the rest.
+# PROFILING_MODE: 'cprofile' (pstats files) or 'sample' (collapsed stacks).
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_MODE = os.environ.get('PROFILING_MODE', 'cprofile')
+PROFILING_DIR = os.environ.get('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+PROFILING_KEEP = int(os.environ.get('PROFILING_KEEP', '500'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
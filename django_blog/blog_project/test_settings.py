@@ -0,0 +1,40 @@
+"""
+Ustawienia do testów i benchmarków: SQLite w pamięci, szybki hasher haseł,
+cache w pamięci procesu. Wybierane automatycznie przez `manage.py test`:
+
+    python manage.py test --parallel
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+    # Druga baza do testów routera; w testach jest lustrem bazy głównej.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+# Domyślnie odczyty zostają na bazie głównej - testy routera włączają replikę same.
+REPLICA_WEIGHTS = {}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+LIVE_EVENTS_BACKEND = 'local'
+
+SECURE_SSL_REDIRECT = False
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Usuwa wygasłe sesje z bazy danych partiami, bez długiej blokady tabeli.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE.endswith('signed_cookies'):
+            self.stdout.write('Sesje są przechowywane w ciasteczkach - nie ma czego usuwać.')
+            return
+
+        batch_size = options['batch_size']
+        now = timezone.now()
+        deleted = 0
+
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                break
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f'Usunięto {deleted} wygasłych sesji.'))
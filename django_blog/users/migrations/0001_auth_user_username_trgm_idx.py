@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+# Tabela auth_user należy do django.contrib.auth, który nie pozwala dodać
+# własnych indeksów. Indeks trigramowy dla wyszukiwania użytkowników w
+# adminie (patrz blog/migrations/0008) zakłada więc aplikacja users, która
+# odpowiada w projekcie za konta. Nazwa z prefiksem blog_ zostaje dla
+# zgodności z bazami, w których indeks powstał wcześniej - IF NOT EXISTS
+# sprawia, że tam migracja niczego nie zmienia.
+INDEX_NAME = 'blog_auth_user_username_trgm_idx'
+
+
+def create_username_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON auth_user USING gin (UPPER(username::text) gin_trgm_ops)'
+    )
+
+
+def drop_username_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        # Rozszerzenie pg_trgm.
+        ('blog', '0008_admin_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_username_index, drop_username_index),
+    ]
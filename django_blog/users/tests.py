@@ -1,3 +1,52 @@
 from django.test import TestCase
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+
+class SessionUsageTest(TestCase):
+    def test_anonymous_browsing_creates_no_session(self):
+        self.client.get(reverse('post_list'))
+        self.assertEqual(Session.objects.count(), 0)
+        self.assertNotIn('sessionid', self.client.cookies)
+
+    def test_anonymous_message_uses_cookie_storage(self):
+        response = self.client.post(
+            reverse('newsletter_signup'),
+            {'email': 'test@example.com'},
+            follow=True
+        )
+        self.assertContains(response, 'Dziękujemy za zapisanie się do newslettera!')
+        self.assertEqual(Session.objects.count(), 0)
+
+    def test_register_message_uses_cookie_storage(self):
+        response = self.client.post(reverse('register'), {
+            'username': 'newuser',
+            'email': 'new@example.com',
+            'password1': 'Zlozone#Haslo123',
+            'password2': 'Zlozone#Haslo123',
+        }, follow=True)
+        self.assertContains(response, 'Konto utworzone dla newuser!')
+        self.assertTrue(User.objects.filter(username='newuser').exists())
+        self.assertEqual(Session.objects.count(), 0)
+
+
+class PruneSessionsCommandTest(TestCase):
+    def create_session(self, key, expire_date):
+        Session.objects.create(session_key=key, session_data='', expire_date=expire_date)
+
+    def test_prunes_only_expired_sessions(self):
+        now = timezone.now()
+        for i in range(5):
+            self.create_session(f'expired{i}', now - timedelta(days=1))
+        self.create_session('active', now + timedelta(days=1))
+
+        out = StringIO()
+        call_command('prune_sessions', '--batch-size', '2', stdout=out)
+
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['active'])
+        self.assertIn('5', out.getvalue())
@@ -20,4 +20,4 @@ def register(request):
 
 @login_required
 def profile(request):
-    return render(request, 'users/profile.html')
\ No newline at end of file
+    return redirect('author_detail', username=request.user.username)
\ No newline at end of file